@@ -0,0 +1,58 @@
+import multiprocessing
+import os
+
+# gunicorn -c gunicorn_config.py, see scripts/start.sh
+# GUNICORN_WORKER_CLASS=uvicorn selects ASGI workers running loan_api.asgi,
+# anything else runs the WSGI application with threaded sync workers
+
+bind = f"{os.getenv('DJANGO_BIND_ADDRESS', '0.0.0.0')}:{os.getenv('DJANGO_BIND_PORT', '8000')}"
+
+cpu_count = multiprocessing.cpu_count()
+
+if os.getenv("GUNICORN_WORKER_CLASS", "sync") == "uvicorn":
+    wsgi_app = "loan_api.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    # One event loop per core already overlaps the waits on the database
+    workers = int(os.getenv("GUNICORN_WORKERS", cpu_count))
+else:
+    wsgi_app = "loan_api.wsgi:application"
+    worker_class = "gthread"
+    workers = int(os.getenv("GUNICORN_WORKERS", cpu_count * 2 + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Django is imported once in the master and the workers fork from it, which
+# shares its memory and makes (re)starting workers fast
+preload_app = True
+
+# Recycles workers now and then to bound memory growth, at different times
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = timeout
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = "-" if os.getenv("GUNICORN_ACCESS_LOG") else None
+errorlog = "-"
+
+
+def on_starting(server):
+    # Runs in the master once the application is preloaded. The throttles
+    # would allow each client their rates once per worker with a cache per
+    # process
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "loan_api.settings")
+    from django.conf import settings
+
+    from loan_api.cache import require_shared_caches
+
+    require_shared_caches(settings.CACHES, ["throttle"], server.cfg.workers)
+
+    # Loads (or generates) the OpenAPI schema before the workers fork, so
+    # they start with it in memory instead of each loading it on its first
+    # docs request
+    if settings.API_DOCS and server.cfg.preload_app:
+        from loan_api.schema import SCHEMA_FORMATS
+        from loan_api.schema import schema_document
+
+        for schema_format in SCHEMA_FORMATS:
+            schema_document(schema_format)
@@ -0,0 +1,52 @@
+from typing import Iterable
+from typing import Optional
+
+from django.core.exceptions import ImproperlyConfigured
+
+LOCMEM_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+REDIS_BACKEND = "django.core.cache.backends.redis.RedisCache"
+
+
+def cache_config(
+    name: str,
+    backend: Optional[str] = None,
+    location: Optional[str] = None,
+    redis_url: Optional[str] = None,
+    max_entries: int = 10000,
+    **params,
+) -> dict:
+    """Builds a CACHES entry, in Redis at redis_url when there's one.
+
+    Redis is shared by every worker process, so an entry one of them drops or
+    a counter it increments is seen by the others. Without it, each process
+    keeps a local-memory cache named name, holding up to max_entries. backend
+    and location override either. params are the other keys of the entry,
+    e.g. TIMEOUT.
+    """
+    if backend is None:
+        backend = REDIS_BACKEND if redis_url else LOCMEM_BACKEND
+    if location is None:
+        location = redis_url if backend == REDIS_BACKEND else name
+
+    config = {"BACKEND": backend, "LOCATION": location, **params}
+    if backend == LOCMEM_BACKEND:
+        # Least recently used entries are evicted past this size. Other
+        # backends reject the option
+        config["OPTIONS"] = {"MAX_ENTRIES": max_entries}
+    return config
+
+
+def require_shared_caches(caches: dict, aliases: Iterable[str], workers: int):
+    """Refuses several worker processes keeping their own entries of aliases.
+
+    Counters in a local-memory cache, e.g. the throttles' buckets, would be
+    kept once per worker, each allowing the whole rate.
+    """
+    if workers <= 1:
+        return
+    local = [alias for alias in aliases if caches[alias]["BACKEND"] == LOCMEM_BACKEND]
+    if local:
+        raise ImproperlyConfigured(
+            f"The {', '.join(local)} cache must be shared by the {workers} "
+            "workers, set REDIS_URL or run a single worker"
+        )
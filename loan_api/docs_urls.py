@@ -0,0 +1,26 @@
+from django.urls import path
+from django.urls import re_path
+from drf_yasg.views import get_schema_view
+from rest_framework.documentation import include_docs_urls
+
+from loan_api.schema import INFO
+from loan_api.schema import UISchemaGenerator
+from loan_api.schema import schema_view
+
+# Included by loan_api.urls when settings.API_DOCS is set
+
+ui_view = get_schema_view(INFO, public=True, generator_class=UISchemaGenerator)
+
+urlpatterns = [
+    path(
+        "api/v1/docs/",
+        ui_view.with_ui("swagger", cache_timeout=0),
+        name="schema-swagger-ui",
+    ),
+    path("api/v1/redoc/", include_docs_urls(title="API Documentation", public=True)),
+    re_path(
+        r"^swagger(?P<format>\.json|\.yaml)$",
+        schema_view,
+        name="schema-json",
+    ),
+]
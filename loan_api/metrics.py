@@ -0,0 +1,130 @@
+import hmac
+import threading
+
+from bisect import bisect_left
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.http import HttpResponseForbidden
+
+DURATION_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+QUERY_COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    # Prometheus-style cumulative histogram, kept in the process memory. Every
+    # worker process exposes its own, the scraper sums them up
+
+    def __init__(self, name, documentation, labels, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # One count per bucket plus +Inf, then the sum
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1)
+                series.append(0.0)
+            series[index] += 1
+            series[-1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def samples(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+
+        for label_values, values in sorted(series.items()):
+            labels = ",".join(
+                f'{name}="{escape(value)}"'
+                for name, value in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                yield f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {values[-1]}"
+            yield f"{self.name}_count{{{labels}}} {cumulative}"
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        yield from self.samples()
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Wall time spent in the view and middlewares.",
+    ("view", "method"),
+)
+DB_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Total SQL time per request.",
+    ("view", "method"),
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request",
+    "SQL queries executed per request.",
+    ("view", "method"),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+HISTOGRAMS: List[Histogram] = [REQUEST_DURATION, DB_DURATION, DB_QUERIES]
+
+# Extra "name value" gauges and counters, collected on every scrape
+COLLECTORS: List[Callable[[], Dict[str, float]]] = []
+
+
+def render() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for collector in COLLECTORS:
+        for name, value in collector().items():
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def can_read_metrics(request):
+    # The bearer token is checked first, so scrapes don't touch the database
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(authorization, f"Bearer {token}"):
+        return True
+    return request.user.is_staff
+
+
+def metrics_view(request):
+    # Per-view timings and cache counters aren't for the API's clients
+    if not can_read_metrics(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4")
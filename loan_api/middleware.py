@@ -0,0 +1,92 @@
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+
+from loan_api.metrics import DB_DURATION
+from loan_api.metrics import DB_QUERIES
+from loan_api.metrics import REQUEST_DURATION
+
+
+class QueryTimer:
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# Context variables follow the request into sync_to_async threads, where async
+# views run their queries on that thread's connections
+current_timer: ContextVar = ContextVar("current_timer", default=None)
+
+
+def time_queries(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += perf_counter() - started
+        timer.count += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # Connected to connection_created, so every connection of every thread
+    # reports to the request being served
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+class PerformanceMiddleware:
+    # Records wall time, SQL queries and SQL time per view in loan_api.metrics
+    # and reports them in the Server-Timing header. Streaming responses are
+    # measured until the body starts, not until it's fully sent.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.record(request, response, timer, perf_counter() - started)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.record(request, response, timer, perf_counter() - started)
+
+    def record(self, request, response, timer, duration):
+        # View names keep the label cardinality bounded, unlike paths
+        match = request.resolver_match
+        labels = (match.view_name if match else "unmatched", request.method)
+        REQUEST_DURATION.observe(labels, duration)
+        DB_DURATION.observe(labels, timer.duration)
+        DB_QUERIES.observe(labels, timer.count)
+
+        response["Server-Timing"] = (
+            f'db;dur={timer.duration * 1000:.3f};desc="{timer.count} queries", '
+            f"total;dur={duration * 1000:.3f}"
+        )
+        return response
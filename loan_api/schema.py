@@ -0,0 +1,109 @@
+import hashlib
+
+from functools import cache
+from importlib.metadata import version
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.codecs import OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+INFO = openapi.Info(
+    title="Matera API",
+    default_version="v1",
+    description="Matera challenge loan API",
+    terms_of_service="https://www.suaapi.com/terms/",
+    contact=openapi.Contact(email="contato@suaapi.com"),
+    license=openapi.License(name="Licença da sua API"),
+)
+
+# Format suffix of the schema URL to its content type and drf_yasg codec
+SCHEMA_FORMATS: dict = {
+    ".json": ("application/json", OpenAPICodecJson),
+    ".yaml": ("application/yaml", OpenAPICodecYaml),
+}
+# Packages whose upgrades can change the generated schema
+SCHEMA_PACKAGES = ("django", "djangorestframework", "drf-yasg")
+
+
+@cache
+def code_version():
+    """Digest of what the schema is generated from, computed once per process.
+
+    That's the project's Python sources and the versions of the packages
+    introspecting them: the schema only needs regenerating when this changes.
+    """
+    digest = hashlib.sha256()
+    for app in ("loan_api", "loans"):
+        for path in sorted((settings.BASE_DIR / app).rglob("*.py")):
+            digest.update(path.relative_to(settings.BASE_DIR).as_posix().encode())
+            digest.update(path.read_bytes())
+    for package in SCHEMA_PACKAGES:
+        digest.update(f"{package}=={version(package)}".encode())
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(schema_format, code_version) -> Path:
+    return settings.SCHEMA_ROOT / f"openapi-{code_version}{schema_format}"
+
+
+def generate_schema():
+    # Without a request there's no host in the schema, clients use the one
+    # serving it unless API_BASE_URL is set
+    generator = OpenAPISchemaGenerator(INFO, url=settings.API_BASE_URL)
+    return generator.get_schema(request=None, public=True)
+
+
+def encode_schema(schema, schema_format, validators=()):
+    _, codec_class = SCHEMA_FORMATS[schema_format]
+    return codec_class(validators=list(validators)).encode(schema)
+
+
+def write_schema(validators=("ssv",)):
+    """Writes the schema of the current code version in every format.
+
+    Returns the written paths. Meant to run at build time, see the
+    generate_schema command, so workers start with the schema ready.
+    """
+    schema = generate_schema()
+    paths = []
+    settings.SCHEMA_ROOT.mkdir(parents=True, exist_ok=True)
+    for schema_format in SCHEMA_FORMATS:
+        path = artifact_path(schema_format, code_version())
+        path.write_bytes(encode_schema(schema, schema_format, validators))
+        paths.append(path)
+    return paths
+
+
+@cache
+def schema_document(schema_format):
+    # The artifact of the current code version when it was written, the
+    # schema generated in memory otherwise. Either way once per process
+    path = artifact_path(schema_format, code_version())
+    if path.exists():
+        return path.read_bytes()
+    return encode_schema(generate_schema(), schema_format)
+
+
+def schema_etag(request, format):
+    return f"{code_version()}{format}"
+
+
+@condition(etag_func=schema_etag)
+def schema_view(request, format):
+    content_type, _ = SCHEMA_FORMATS[format]
+    response = HttpResponse(schema_document(format), content_type=content_type)
+    patch_cache_control(response, public=True, max_age=settings.SCHEMA_CACHE_MAX_AGE)
+    return response
+
+
+class UISchemaGenerator(OpenAPISchemaGenerator):
+    # The Swagger UI page only shows the title and version, it loads the
+    # schema itself from SWAGGER_SETTINGS["SPEC_URL"], i.e. schema_view
+    def get_schema(self, request=None, public=False):
+        return openapi.Swagger(info=self.info, _prefix="/", paths=openapi.Paths({}))
@@ -1,11 +1,57 @@
+import uuid
+
 from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Q
 
 from loans.models import Loan
 from loans.models import Payment
+from loans.pagination import EstimatedCountPaginator
+
+
+def users_with_prefix(prefix):
+    users = User.objects.filter(username__startswith=prefix)
+    if connection.vendor == "sqlite":
+        # SQLite's LIKE is case insensitive and can't use the username index,
+        # the same prefix as a range can
+        users = users.filter(username__gte=prefix, username__lt=prefix + "\U0010ffff")
+    return users.values("pk")
+
+
+class IndexedChangeListMixin:
+    """Changelist options keeping every query on an index at any table size.
+
+    The search matches a UUID exactly against uuid_search_fields, anything
+    else as the start of the username of client_field: no LIKE '%term%' scan.
+    The count is estimated when nothing is filtered, the total count with no
+    filters isn't shown at all and only indexed columns can be sorted on.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    uuid_search_fields: tuple = ("id",)
+    client_field = ""
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        try:
+            value = uuid.UUID(term)
+        except ValueError:
+            users = users_with_prefix(term)
+            return queryset.filter(**{f"{self.client_field}__in": users}), False
+
+        match = Q()
+        for field in self.uuid_search_fields:
+            match |= Q(**{field: value})
+        return queryset.filter(match), False
 
 
 @admin.register(Loan)
-class LoanAdmin(admin.ModelAdmin):
+class LoanAdmin(IndexedChangeListMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "nominal_value",
@@ -15,10 +61,23 @@ class LoanAdmin(admin.ModelAdmin):
         "bank",
         "client",
     )
-    search_fields = ("client__username", "id")
+    list_select_related = ("client",)
+    sortable_by = ("id", "request_date")
+    date_hierarchy = "request_date"
+    search_fields = ("id", "client__username")
+    search_help_text = "Loan id, or the start of a username"
+    client_field = "client"
+    raw_id_fields = ("client",)
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(IndexedChangeListMixin, admin.ModelAdmin):
     list_display = ("id", "loan", "payment_date", "payment_value")
-    search_fields = ("loan__client__username", "id")
+    list_select_related = ("loan__client",)
+    sortable_by = ("id", "payment_date")
+    date_hierarchy = "payment_date"
+    search_fields = ("id", "loan__id", "client__username")
+    search_help_text = "Payment or loan id, or the start of a username"
+    uuid_search_fields = ("id", "loan")
+    client_field = "client"
+    raw_id_fields = ("loan",)
@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+from loan_api.database import configure_sqlite_connection
+from loan_api.metrics import COLLECTORS
+from loan_api.middleware import install_query_timer
 
 
 class LoansConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "loans"
+
+    def ready(self):
+        import loans.signals  # noqa: F401
+
+        from loans.cache import balance_cache
+        from loans.cache import idempotency_cache
+        from loans.cache import token_cache
+
+        connection_created.connect(configure_sqlite_connection)
+        connection_created.connect(install_query_timer)
+        COLLECTORS.append(balance_cache.metrics)
+        COLLECTORS.append(token_cache.metrics)
+        COLLECTORS.append(idempotency_cache.metrics)
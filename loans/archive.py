@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from loans.analytics import remaining_balance_cents
+from loans.models import ArchivedLoan
+from loans.models import ArchivedPayment
+from loans.models import Loan
+from loans.models import Payment
+
+LOAN_FIELDS = [
+    "id",
+    "nominal_value",
+    "interest_rate",
+    "ip_address",
+    "request_date",
+    "bank",
+    "client_id",
+    "iof_rate",
+    "total_paid",
+    "payment_count",
+    "last_payment_date",
+    "settled_at",
+]
+PAYMENT_FIELDS = ["id", "loan_id", "payment_date", "payment_value"]
+
+
+def settled_loans(days, now=None):
+    # Loans settled over days ago. A settled balance never grows back, the
+    # principal is paid and no interest accrues, it's checked again in case
+    # the loan itself was edited since
+    now = now or timezone.now()
+    return (
+        Loan.objects.filter(settled_at__lt=now - timedelta(days=days))
+        .alias(remaining_balance=remaining_balance_cents(timezone.localdate(now)))
+        .filter(remaining_balance__lte=0)
+    )
+
+
+def archive_settled_loans(days, batch_size=500, now=None):
+    """Moves loans settled over days ago and their payments to the archive.
+
+    Each batch is copied to ArchivedLoan and ArchivedPayment and deleted from
+    the hot tables, with the loans' snapshots, in one transaction, so a loan is
+    always in exactly one place and an interrupted run loses nothing. Yields
+    the number of loans archived per batch.
+    """
+    pending = settled_loans(days, now).order_by("pk").values_list("pk", flat=True)
+    last_pk = None
+    while True:
+        batch = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+        ids = list(batch[:batch_size])
+        if not ids:
+            return
+
+        with transaction.atomic():
+            loans = Loan.objects.filter(pk__in=ids).for_update()
+            rows = list(loans.values(*LOAN_FIELDS))
+            archived_ids = [row["id"] for row in rows]
+            archived_at = timezone.now()
+            ArchivedLoan.objects.bulk_create(
+                ArchivedLoan(archived_at=archived_at, **row) for row in rows
+            )
+            payments = Payment.objects.filter(loan_id__in=archived_ids)
+            ArchivedPayment.objects.bulk_create(
+                ArchivedPayment(**row) for row in payments.values(*PAYMENT_FIELDS)
+            )
+
+            # Cascades to the payments and snapshots, the signals drop the
+            # cached balances and skip recounting payments of deleted loans
+            Loan.objects.filter(pk__in=archived_ids).delete()
+
+        last_pk = ids[-1]
+        yield len(archived_ids)
@@ -0,0 +1,124 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework import status
+from rest_framework.request import Request
+
+from loan_api.renderers import FastJSONRenderer
+from loans.authentication import AsyncTokenAuthentication
+from loans.cache import balance_cache
+from loans.models import Loan
+from loans.serializers import RemainingBalanceSerializer
+from loans.views import LoanListCreateView
+from loans.views import PaymentListCreateView
+from loans.views import RemainingBalanceView
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def async_read_view(sync_view_class, authentication_required=True):
+    # GETs are served by the decorated coroutine on the async ORM, any other
+    # method goes to the synchronous DRF view in a thread
+    sync_view = sync_to_async(sync_view_class.as_view())
+
+    def decorator(handler):
+        @csrf_exempt
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method != "GET":
+                return await sync_view(request, *args, **kwargs)
+
+            authentication = AsyncTokenAuthentication()
+            try:
+                credentials = await authentication.aauthenticate(request)
+                if credentials is None and authentication_required:
+                    raise exceptions.NotAuthenticated()
+
+                drf_request = Request(request)
+                drf_request.user, drf_request.auth = credentials or (
+                    AnonymousUser(),
+                    None,
+                )
+                # The same throttles as the synchronous view, their cache
+                # calls stay on the event loop as the balance cache's do
+                throttled_view = sync_view_class(
+                    request=drf_request, args=args, kwargs=kwargs
+                )
+                throttled_view.check_throttles(drf_request)
+                return await handler(drf_request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                headers = None
+                if isinstance(
+                    exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+                ):
+                    headers = {
+                        "WWW-Authenticate": authentication.authenticate_header(request)
+                    }
+                elif isinstance(exc, exceptions.Throttled) and exc.wait:
+                    headers = {"Retry-After": str(exc.wait)}
+                data = exc.detail
+                if not isinstance(data, (list, dict)):
+                    data = {"detail": data}
+                return json_response(data, status=exc.status_code, headers=headers)
+
+        return view
+
+    return decorator
+
+
+async def paginated_response(view):
+    # Same queryset, serializer and pagination as the synchronous view
+    page = await view.paginator.apaginate_queryset(
+        view.get_queryset(), view.request, view=view
+    )
+    serializer = view.get_serializer(page, many=True)
+    return json_response(view.paginator.get_paginated_response(serializer.data).data)
+
+
+@async_read_view(LoanListCreateView)
+async def loan_list(request):
+    return await paginated_response(
+        LoanListCreateView(request=request, format_kwarg=None)
+    )
+
+
+@async_read_view(PaymentListCreateView)
+async def payment_list(request):
+    return await paginated_response(
+        PaymentListCreateView(request=request, format_kwarg=None)
+    )
+
+
+@async_read_view(RemainingBalanceView, authentication_required=False)
+async def remaining_balance(request, id):
+    # The balance cache is in memory by default, so it's read without leaving
+    # the event loop
+    cached, version = balance_cache.lookup(id)
+    if cached is None:
+        try:
+            instance = await Loan.objects.aget(id=id)
+        except Loan.DoesNotExist:
+            raise exceptions.NotFound()
+        serializer = RemainingBalanceSerializer(instance)
+        cached = {"client_id": instance.client_id, "data": dict(serializer.data)}
+        balance_cache.set(id, cached, version)
+
+    # Checks if the loan belongs to the authenticated user
+    if cached["client_id"] != request.user.pk:
+        return json_response(
+            {"error": "You do not have permission to access the resource"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    return json_response(cached["data"])
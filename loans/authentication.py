@@ -0,0 +1,52 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from loans.cache import token_cache
+
+
+class TokenHeader(TokenAuthentication):
+    # Parses and validates the Authorization header, returning only the key
+    def authenticate_credentials(self, key):
+        return key
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    # TokenAuthentication that keeps valid tokens and their users in
+    # loans.cache.token_cache, saving the token query on most requests.
+    # Invalid and inactive credentials are never cached
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, token)
+        return (token.user, token)
+
+
+class AsyncTokenAuthentication(CachedTokenAuthentication):
+    # Same header, errors, checks and cache as CachedTokenAuthentication, with
+    # the token looked up through the async ORM
+
+    async def aauthenticate(self, request):
+        key = TokenHeader().authenticate(request)
+        if key is None:
+            return None
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is not None:
+            return (token.user, token)
+
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related("user").aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        token_cache.set(key, token)
+        return (token.user, token)
@@ -0,0 +1,156 @@
+import hashlib
+import threading
+import uuid
+
+from datetime import date
+
+from django.core.cache import caches
+
+BALANCE_CACHE_ALIAS = "balances"
+TOKEN_CACHE_ALIAS = "tokens"
+IDEMPOTENCY_CACHE_ALIAS = "idempotency"
+
+
+class CountingCache:
+    # An alias of CACHES counting its hits and misses, exposed on /metrics as
+    # <metric_prefix>_hits_total and <metric_prefix>_misses_total. Subclasses
+    # build the keys from their own arguments
+
+    def __init__(self, alias, metric_prefix):
+        self.alias = alias
+        self.metric_prefix = metric_prefix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, *args):
+        raise NotImplementedError
+
+    def get(self, *args):
+        return self.count(self.cache.get(self.key(*args)))
+
+    def count(self, value):
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def metrics(self):
+        stats = self.stats()
+        return {
+            f"{self.metric_prefix}_hits_total": stats["hits"],
+            f"{self.metric_prefix}_misses_total": stats["misses"],
+        }
+
+
+class BalanceCache(CountingCache):
+    # Balances only change when a payment lands or the day rolls over, so
+    # entries are keyed by loan and date and dropped by the signals in
+    # loans.signals whenever a loan or one of its payments changes.
+    #
+    # Dropping an entry isn't enough: a request may load the loan before a
+    # payment commits and store its balance after the entry was dropped.
+    # Each loan has a version instead, replaced on every change, and entries
+    # are stored with the version read before the loan was loaded. One
+    # stored with an older version is a miss
+
+    def __init__(self, alias=BALANCE_CACHE_ALIAS):
+        super().__init__(alias, "balance_cache")
+
+    def key(self, loan_id, day=None):
+        return f"remaining_balance:{loan_id}:{(day or date.today()).isoformat()}"
+
+    def version_key(self, loan_id):
+        return f"remaining_balance_version:{loan_id}"
+
+    def lookup(self, loan_id):
+        """Returns the cached balance of loan_id, or None, and its version.
+
+        A balance computed on a miss is stored with that version, read before
+        the loan is loaded.
+        """
+        key, version_key = self.key(loan_id), self.version_key(loan_id)
+        entries = self.cache.get_many([key, version_key])
+        version = entries.get(version_key) or self.new_version(loan_id)
+
+        entry = entries.get(key)
+        value = entry["value"] if entry and entry["version"] == version else None
+        return self.count(value), version
+
+    def new_version(self, loan_id):
+        # For a loan without one yet, or whose version was evicted: any entry
+        # stored before is outdated
+        version = uuid.uuid4().hex
+        if self.cache.add(self.version_key(loan_id), version):
+            return version
+        return self.cache.get(self.version_key(loan_id)) or version
+
+    def get(self, loan_id):
+        return self.lookup(loan_id)[0]
+
+    def set(self, loan_id, value, version=None):
+        if version is None:
+            version = self.cache.get(self.version_key(loan_id))
+            version = version or self.new_version(loan_id)
+        self.cache.set(self.key(loan_id), {"version": version, "value": value})
+
+    def invalidate(self, loan_id):
+        self.invalidate_many([loan_id])
+
+    def invalidate_many(self, loan_ids):
+        self.cache.set_many(
+            {self.version_key(loan_id): uuid.uuid4().hex for loan_id in loan_ids}
+        )
+
+
+balance_cache = BalanceCache()
+
+
+class TokenCache(CountingCache):
+    # Authenticated tokens, with their user, so TokenAuthentication doesn't
+    # query them on every request. Entries expire after the alias TIMEOUT and
+    # are dropped by loans.signals when the token or its user changes
+
+    def __init__(self, alias=TOKEN_CACHE_ALIAS):
+        super().__init__(alias, "token_cache")
+
+    def key(self, token_key):
+        # Hashed so a shared cache never holds usable credentials
+        return f"token:{hashlib.sha256(token_key.encode()).hexdigest()}"
+
+    def set(self, token_key, token):
+        self.cache.set(self.key(token_key), token)
+
+    def invalidate_many(self, token_keys):
+        self.cache.delete_many([self.key(token_key) for token_key in token_keys])
+
+
+token_cache = TokenCache()
+
+
+class IdempotencyCache(CountingCache):
+    # Stored responses of loans.idempotency by user and hashed key, so retries
+    # are answered without querying the IdempotencyKey table. Entries expire
+    # with their key
+
+    def __init__(self, alias=IDEMPOTENCY_CACHE_ALIAS):
+        super().__init__(alias, "idempotency_cache")
+
+    def key(self, user_id, key):
+        return f"idempotency:{user_id}:{key}"
+
+    def set(self, user_id, key, value, timeout):
+        self.cache.set(self.key(user_id, key), value, timeout)
+
+
+idempotency_cache = IdempotencyCache()
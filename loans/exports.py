@@ -0,0 +1,28 @@
+import csv
+import json
+
+
+class Echo:
+    # csv.writer only needs an object with a write method, handing the
+    # formatted line back lets the rows be streamed as they are written
+    def write(self, value):
+        return value
+
+
+def iter_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(columns, rows):
+    for row in rows:
+        # default=str keeps decimals exact and writes dates in ISO format
+        yield json.dumps(dict(zip(columns, row)), default=str) + "\n"
+
+
+EXPORT_FORMATS: dict = {
+    "csv": ("text/csv", iter_csv),
+    "ndjson": ("application/x-ndjson", iter_ndjson),
+}
@@ -0,0 +1,150 @@
+import hashlib
+import json
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from loans.cache import idempotency_cache
+from loans.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def request_fingerprint(request):
+    # A key reused for another request is an error, not a retry
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return digest(f"{request.method} {request.path} {body}")
+
+
+def stored_response(user_id, key):
+    # (fingerprint, status_code, response) of a key that hasn't expired
+    stored = idempotency_cache.get(user_id, key)
+    if stored is not None:
+        return stored
+
+    now = timezone.now()
+    row = (
+        IdempotencyKey.objects.filter(user_id=user_id, key=key, expires_at__gt=now)
+        .values_list("fingerprint", "status_code", "response", "expires_at")
+        .first()
+    )
+    if row is None:
+        return None
+
+    stored = row[:3]
+    idempotency_cache.set(user_id, key, stored, (row[3] - now).total_seconds())
+    return stored
+
+
+def store_response(user_id, key, fingerprint, status_code, data):
+    now = timezone.now()
+    # An expired key that wasn't purged yet can be used again
+    IdempotencyKey.objects.filter(
+        user_id=user_id, key=key, expires_at__lte=now
+    ).delete()
+    IdempotencyKey.objects.create(
+        user_id=user_id,
+        key=key,
+        fingerprint=fingerprint,
+        status_code=status_code,
+        response=data,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+    )
+
+    stored = (fingerprint, status_code, data)
+    transaction.on_commit(
+        lambda: idempotency_cache.set(
+            user_id, key, stored, settings.IDEMPOTENCY_KEY_TTL
+        )
+    )
+
+
+def replay(stored, fingerprint):
+    stored_fingerprint, status_code, data = stored
+    if stored_fingerprint != fingerprint:
+        return Response(
+            {"error": f"{IDEMPOTENCY_HEADER} was already used for another request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(data, status=status_code, headers={"Idempotent-Replayed": "true"})
+
+
+class IdempotentCreateMixin:
+    """Makes create() safe to retry with an Idempotency-Key header.
+
+    The response is stored with the created object, in the same transaction,
+    and replayed to any retry carrying the same key until it expires, before
+    the request is validated. Of two requests racing with the same key, the
+    one committing second is rolled back and gets the first response. Failed
+    requests created nothing and aren't stored.
+    """
+
+    idempotency = None
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {
+                    "error": f"{IDEMPOTENCY_HEADER} must have 1 to "
+                    f"{MAX_KEY_LENGTH} characters"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user_id = request.user.pk
+        key = digest(key)
+        fingerprint = request_fingerprint(request)
+
+        stored = stored_response(user_id, key)
+        if stored is not None:
+            return replay(stored, fingerprint)
+
+        self.idempotency = (user_id, key, fingerprint)
+        try:
+            return super().create(request, *args, **kwargs)
+        except IntegrityError:
+            stored = stored_response(user_id, key)
+            if stored is None:
+                raise
+            return replay(stored, fingerprint)
+
+    def perform_create(self, serializer):
+        if self.idempotency is None:
+            return super().perform_create(serializer)
+
+        # The save comes first, on SQLite its write takes the database lock
+        # before the transaction reads anything
+        with transaction.atomic():
+            super().perform_create(serializer)
+            store_response(*self.idempotency, status.HTTP_201_CREATED, serializer.data)
+
+
+def purge_expired_keys(batch_size=5000, now=None):
+    """Deletes expired keys in batches, yielding the number deleted per batch.
+
+    Each batch is a range of the expires_at index and a delete by primary key,
+    committed on its own, so the table is never locked for long.
+    """
+    expired = IdempotencyKey.objects.filter(
+        expires_at__lte=now or timezone.now()
+    ).order_by("expires_at")
+    while True:
+        ids = list(expired.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return
+        deleted, _ = IdempotencyKey.objects.filter(id__in=ids).delete()
+        yield deleted
@@ -0,0 +1,114 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
+
+from loans.cache import balance_cache
+from loans.models import PAYMENT_TOTAL_FIELDS
+from loans.models import Loan
+from loans.models import Payment
+from loans.serializers import PaymentRowSerializer
+
+
+def ingest_payments(rows, batch_size=1000):
+    """Validates and saves a batch of payments, returning one report per row.
+
+    Rows are checked per loan, in payment date order, against a running balance
+    preloaded with a single query, so a batch costs a handful of queries however
+    many rows it has. Accepted rows are saved even when others are rejected.
+    """
+    report = [None] * len(rows)
+    payments_by_loan = defaultdict(list)
+    fields = PaymentRowSerializer().fields
+
+    for index, row in enumerate(rows):
+        data, errors = validate_row(fields, row)
+        if errors:
+            report[index] = {"index": index, "status": "rejected", "errors": errors}
+        else:
+            payments_by_loan[data["loan"]].append((index, data))
+
+    accepted = []
+    paid_loans = {}
+    with transaction.atomic():
+        loans = Loan.objects.filter(pk__in=payments_by_loan).for_update().in_bulk()
+        today = date.today()
+
+        for loan_id, payments in payments_by_loan.items():
+            loan = loans.get(loan_id)
+            payments.sort(key=lambda payment: payment[1]["payment_date"])
+
+            for index, data in payments:
+                if loan is None:
+                    errors = {"loan": ["Loan does not exist."]}
+                elif data["payment_value"] > Loan.compute_remaining_balance(
+                    nominal_value=loan.nominal_value,
+                    interest_rate=loan.interest_rate,
+                    iof_rate=loan.iof_rate,
+                    request_date=loan.request_date,
+                    total_paid=loan.total_paid,
+                    today=today,
+                ):
+                    errors = {
+                        "payment_value": [
+                            "Payment amount greater than remaining balance."
+                        ]
+                    }
+                else:
+                    errors = None
+
+                if errors:
+                    report[index] = {
+                        "index": index,
+                        "status": "rejected",
+                        "errors": errors,
+                    }
+                    continue
+
+                payment = Payment(**{**data, "loan": loan})
+                accepted.append(payment)
+                paid_loans[loan_id] = loan
+                loan.total_paid += payment.payment_value
+                loan.payment_count += 1
+                loan.last_payment_date = max(
+                    loan.last_payment_date or payment.payment_date, payment.payment_date
+                )
+                if loan.calculate_remaining_balance(today) <= 0:
+                    loan.settled_at = loan.settled_at or timezone.now()
+                report[index] = {
+                    "index": index,
+                    "status": "accepted",
+                    "id": str(payment.id),
+                }
+
+        # bulk_create skips Payment.save, the loans are locked so their totals
+        # are written back as computed here
+        Payment.objects.bulk_create(accepted, batch_size=batch_size)
+        Loan.objects.bulk_update(
+            paid_loans.values(), PAYMENT_TOTAL_FIELDS, batch_size=batch_size
+        )
+
+    # bulk_create and bulk_update don't send the signals that drop cached balances
+    balance_cache.invalidate_many(paid_loans)
+
+    return report
+
+
+def validate_row(fields, row):
+    # Runs the serializer fields directly, building a serializer per row spends
+    # most of its time copying the field instances
+    if not isinstance(row, dict):
+        return None, {"non_field_errors": ["Expected a payment object."]}
+
+    data = {}
+    errors = {}
+    for name, field in fields.items():
+        try:
+            data[name] = field.run_validation(row.get(name, empty))
+        except ValidationError as error:
+            errors[name] = error.detail
+
+    return data, errors
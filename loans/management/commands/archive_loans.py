@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from loans.archive import archive_settled_loans
+from loans.models import Loan
+from loans.models import Payment
+
+
+class Command(BaseCommand):
+    help = "Moves loans settled over --days days ago, with their payments, to the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def hot_rows(self):
+        return f"{Loan.objects.count()} loans, {Payment.objects.count()} payments"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Hot tables before: {self.hot_rows()}")
+
+        archived = 0
+        for count in archive_settled_loans(
+            options["days"], batch_size=options["batch_size"]
+        ):
+            archived += count
+            self.stdout.write(f"{archived} loans archived")
+
+        self.stdout.write(f"Hot tables after: {self.hot_rows()}")
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} settled loans."))
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+
+class Command(BaseCommand):
+    help = "Generates and validates the OpenAPI schema of the current code version"
+
+    def handle(self, *args, **options):
+        if not settings.API_DOCS:
+            raise CommandError("The API docs are disabled, see DJANGO_API_DOCS")
+
+        from loan_api.schema import write_schema
+
+        for path in write_schema():
+            self.stdout.write(f"Wrote {path}")
@@ -0,0 +1,46 @@
+import csv
+
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from loans.models import Loan
+from loans.projections import PROJECTION_FIELDS
+from loans.projections import project_balances
+from loans.projections import projection_offsets
+
+
+class Command(BaseCommand):
+    help = "Writes the projected remaining balance of every loan as CSV, one column per date"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--step", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        today = date.today()
+        offsets = projection_offsets(options["days"], options["step"])
+
+        writer = csv.writer(self.stdout)
+        writer.writerow(
+            ["id"] + [today + timedelta(days=int(offset)) for offset in offsets]
+        )
+
+        rows = Loan.objects.order_by("id").values_list(*PROJECTION_FIELDS)
+        batch = []
+        for row in rows.iterator(chunk_size=options["batch_size"]):
+            batch.append(row)
+            if len(batch) == options["batch_size"]:
+                self._write_batch(writer, batch, offsets, today)
+                batch = []
+        self._write_batch(writer, batch, offsets, today)
+
+    def _write_batch(self, writer, rows, offsets, today):
+        ids, cents = project_balances(rows, offsets, today=today)
+        for loan_id, balances in zip(ids, cents):
+            writer.writerow(
+                [loan_id] + [Decimal(int(balance)).scaleb(-2) for balance in balances]
+            )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from loans.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Deletes expired idempotency keys in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        purged = 0
+        for count in purge_expired_keys(batch_size=options["batch_size"]):
+            purged += count
+            self.stdout.write(f"{purged} keys deleted")
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired keys."))
@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from loans.cache import balance_cache
+from loans.models import PAYMENT_TOTAL_FIELDS
+from loans.models import Loan
+
+
+def annotate_actual_totals(queryset):
+    return queryset.only("id", *PAYMENT_TOTAL_FIELDS).annotate(
+        actual_total_paid=Coalesce(Sum("payment__payment_value"), Value(Decimal(0))),
+        actual_payment_count=Count("payment"),
+        actual_last_payment_date=Max("payment__payment_date"),
+    )
+
+
+def has_drifted(loan):
+    return (
+        loan.total_paid != loan.actual_total_paid
+        or loan.payment_count != loan.actual_payment_count
+        or loan.last_payment_date != loan.actual_last_payment_date
+    )
+
+
+class Command(BaseCommand):
+    help = "Checks the running payment totals stored on each loan and repairs drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rewrite the totals of loans that drifted from their payments",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        loans = annotate_actual_totals(Loan.objects.order_by("pk"))
+
+        checked = 0
+        drifted = 0
+        repaired = 0
+        pending = []
+        for loan in loans.iterator(chunk_size=batch_size):
+            checked += 1
+            if not has_drifted(loan):
+                continue
+
+            drifted += 1
+            self.stdout.write(
+                f"Loan {loan.id}: stored ({loan.total_paid}, {loan.payment_count}, "
+                f"{loan.last_payment_date}) != actual ({loan.actual_total_paid}, "
+                f"{loan.actual_payment_count}, {loan.actual_last_payment_date})"
+            )
+            pending.append(loan.pk)
+            if options["fix"] and len(pending) >= batch_size:
+                repaired += self._repair(pending)
+                pending = []
+
+        if not options["fix"]:
+            self.stdout.write(
+                f"Checked {checked} loans, {drifted} drifted. "
+                "Run with --fix to repair them."
+            )
+            return
+
+        repaired += self._repair(pending)
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} loans, repaired {repaired}.")
+        )
+
+    def _repair(self, loan_ids):
+        if not loan_ids:
+            return 0
+
+        # Totals are recomputed under lock so payments landing meanwhile are kept
+        with transaction.atomic():
+            locked = Loan.objects.select_for_update().filter(pk__in=loan_ids)
+            list(locked.values_list("pk", flat=True))
+
+            loans = [
+                loan
+                for loan in annotate_actual_totals(Loan.objects.filter(pk__in=loan_ids))
+                if has_drifted(loan)
+            ]
+            for loan in loans:
+                loan.total_paid = loan.actual_total_paid
+                loan.payment_count = loan.actual_payment_count
+                loan.last_payment_date = loan.actual_last_payment_date
+            Loan.objects.bulk_update(loans, PAYMENT_TOTAL_FIELDS)
+            Loan.objects.filter(pk__in=[loan.pk for loan in loans]).update_settled_at()
+
+        balance_cache.invalidate_many(loan.pk for loan in loans)
+        return len(loans)
@@ -0,0 +1,108 @@
+import json
+import random
+
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from loans.models import PAYMENT_TOTAL_FIELDS
+from loans.models import Loan
+from loans.models import Payment
+
+
+class Command(BaseCommand):
+    help = "Creates users, tokens, loans and payments in bulk for benchmarks and load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--loans", type=int, default=100000)
+        parser.add_argument("--payments", type=int, default=1000000)
+        parser.add_argument("--password", default="bench")
+        parser.add_argument("--prefix", default="bench-user")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--tokens-file",
+            help="Writes the created users' tokens as JSON, for scripts/load_test.py",
+        )
+
+    def handle(self, *args, **options):
+        generator = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        today = date.today()
+
+        # Hashing once keeps seeding fast, every user gets the same password
+        password = make_password(options["password"])
+
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                (
+                    User(username=f"{options['prefix']}-{index}", password=password)
+                    for index in range(options["users"])
+                ),
+                batch_size=batch_size,
+            )
+            tokens = Token.objects.bulk_create(
+                (Token(user=user, key=Token.generate_key()) for user in users),
+                batch_size=batch_size,
+            )
+
+        loans = []
+        for start in range(0, options["loans"], batch_size):
+            batch = Loan.objects.bulk_create(
+                Loan(
+                    nominal_value=Decimal(generator.randint(100000, 10000000)) / 100,
+                    interest_rate=Decimal(generator.randint(1, 10)) / 100,
+                    iof_rate=Decimal(generator.randint(0, 5)) / 100,
+                    ip_address="127.0.0.1",
+                    bank=f"Bank {generator.randint(1, 20)}",
+                    client=users[generator.randrange(len(users))],
+                )
+                for _ in range(min(batch_size, options["loans"] - start))
+            )
+            # request_date is auto_now_add, each batch is moved back in time
+            # with a single UPDATE
+            Loan.objects.filter(pk__in=[loan.pk for loan in batch]).update(
+                request_date=today - timedelta(days=generator.randint(30, 365))
+            )
+            loans.extend(batch)
+
+        # Payments are small enough that no loan gets overpaid, the loan totals
+        # are kept along the way and written once at the end
+        payments_left = options["payments"]
+        while payments_left > 0:
+            payments = []
+            for _ in range(min(batch_size, payments_left)):
+                loan = loans[generator.randrange(len(loans))]
+                payment = Payment(
+                    loan=loan,
+                    payment_date=today - timedelta(days=generator.randint(0, 30)),
+                    payment_value=Decimal(generator.randint(100, 1000)) / 100,
+                )
+                loan.total_paid += payment.payment_value
+                loan.payment_count += 1
+                loan.last_payment_date = max(
+                    loan.last_payment_date or payment.payment_date, payment.payment_date
+                )
+                payments.append(payment)
+            Payment.objects.bulk_create(payments)
+            payments_left -= len(payments)
+
+        Loan.objects.bulk_update(loans, PAYMENT_TOTAL_FIELDS, batch_size=batch_size)
+
+        if options["tokens_file"]:
+            with open(options["tokens_file"], "w") as tokens_file:
+                json.dump([token.key for token in tokens], tokens_file)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(users)} users, {len(loans)} loans and "
+                f"{options['payments']} payments."
+            )
+        )
@@ -0,0 +1,49 @@
+from datetime import date
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from loans.snapshots import prune_snapshots
+from loans.snapshots import snapshot_balances
+
+
+class Command(BaseCommand):
+    help = "Materializes the remaining balance of the day for loans without a current snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            help="Day to snapshot, YYYY-MM-DD. Defaults to today",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=settings.SNAPSHOT_RETENTION_DAYS,
+            help="Deletes snapshots older than this many days before --date, "
+            "0 keeps them all. Defaults to SNAPSHOT_RETENTION_DAYS",
+        )
+
+    def handle(self, *args, **options):
+        day = options["date"] or date.today()
+
+        written = 0
+        for count in snapshot_balances(day, batch_size=options["batch_size"]):
+            written += count
+            self.stdout.write(f"{written} loans written")
+
+        pruned = 0
+        if options["keep_days"]:
+            before = day - timedelta(days=options["keep_days"])
+            for count in prune_snapshots(before):
+                pruned += count
+                self.stdout.write(f"{pruned} old snapshots deleted")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Snapshotted {written} loans for {day}, "
+                f"deleted {pruned} old snapshots."
+            )
+        )
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_payment_totals(apps, schema_editor):
+    Loan = apps.get_model("loans", "Loan")
+    Payment = apps.get_model("loans", "Payment")
+
+    payments = Payment.objects.filter(loan=OuterRef("pk")).values("loan")
+
+    Loan.objects.update(
+        total_paid=Coalesce(
+            Subquery(payments.annotate(total=Sum("payment_value")).values("total")),
+            Value(Decimal(0)),
+        ),
+        payment_count=Coalesce(
+            Subquery(payments.annotate(count=Count("id")).values("count")),
+            Value(0),
+        ),
+        last_payment_date=Subquery(
+            payments.annotate(last=Max("payment_date")).values("last")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0004_loan_payment_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_payment_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-18 10:55
+
+import django.db.models.deletion
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0005_backfill_loan_payment_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['client', 'request_date'], name='loan_client_request_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['loan', 'payment_date', 'payment_value'], name='payment_loan_date_value_idx'),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='loan',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='loans.loan'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:25
+
+import django.db.models.deletion
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0006_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoanBalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("total_paid", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "remaining_balance",
+                    models.DecimalField(decimal_places=2, max_digits=14),
+                ),
+                (
+                    "loan",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="loans.loan",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="loanbalancesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("date", "loan"), name="snapshot_date_loan_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:08
+
+import django.db.models.deletion
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0008_idempotency_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedLoan",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("nominal_value", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("interest_rate", models.DecimalField(decimal_places=2, max_digits=5)),
+                ("ip_address", models.GenericIPAddressField()),
+                ("request_date", models.DateField()),
+                ("bank", models.CharField(max_length=255)),
+                ("iof_rate", models.DecimalField(decimal_places=2, max_digits=5)),
+                ("total_paid", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("payment_count", models.PositiveIntegerField()),
+                ("last_payment_date", models.DateField(blank=True, null=True)),
+                ("archived_at", models.DateTimeField()),
+                (
+                    "client",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedPayment",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("payment_date", models.DateField()),
+                ("payment_value", models.DecimalField(decimal_places=2, max_digits=10)),
+                (
+                    "loan",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="loans.archivedloan",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="archivedloan",
+            index=models.Index(
+                fields=["client", "request_date"], name="archived_loan_client_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedpayment",
+            index=models.Index(
+                fields=["loan", "payment_date"], name="archived_payment_loan_date_idx"
+            ),
+        ),
+    ]
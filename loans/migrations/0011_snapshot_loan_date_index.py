@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:38
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0010_admin_date_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="loanbalancesnapshot",
+            index=models.Index(fields=["loan", "date"], name="snapshot_loan_date_idx"),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:47
+
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+from django.utils import timezone
+
+BALANCE_FIELDS = [
+    "nominal_value",
+    "interest_rate",
+    "iof_rate",
+    "request_date",
+    "total_paid",
+]
+
+
+def remaining_balance(
+    nominal_value, interest_rate, iof_rate, request_date, total_paid, today
+):
+    # Loan.compute_remaining_balance as of this migration
+    days_passed = (today - request_date).days
+    accumulated_rates = (
+        (interest_rate / 30) * days_passed * (nominal_value - total_paid)
+    )
+    iof_cost = iof_rate * nominal_value
+    return round(nominal_value + accumulated_rates + iof_cost - total_paid, 2)
+
+
+def backfill_settled_at(apps, schema_editor, batch_size=500):
+    # When the loans already paid off were settled is unknown, they're marked
+    # settled now, so archive_loans waits its full delay before moving them
+    Loan = apps.get_model("loans", "Loan")
+
+    now = timezone.now()
+    today = date.today()
+    rows = Loan.objects.values_list("pk", *BALANCE_FIELDS).iterator(
+        chunk_size=batch_size
+    )
+    settled = []
+    for pk, *fields in rows:
+        if remaining_balance(*fields, today) <= 0:
+            settled.append(pk)
+    for start in range(0, len(settled), batch_size):
+        batch = settled[start : start + batch_size]
+        Loan.objects.filter(pk__in=batch).update(settled_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0011_snapshot_loan_date_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedloan",
+            name="settled_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="loan",
+            name="settled_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="loan",
+            index=models.Index(fields=["settled_at"], name="loan_settled_at_idx"),
+        ),
+        migrations.RunPython(backfill_settled_at, migrations.RunPython.noop),
+    ]
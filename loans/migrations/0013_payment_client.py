@@ -0,0 +1,59 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:30
+
+import django.db.models.deletion
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+from django.db.models import OuterRef
+from django.db.models import Subquery
+
+
+def copy_loan_clients(apps, schema_editor):
+    Loan = apps.get_model("loans", "Loan")
+    Payment = apps.get_model("loans", "Payment")
+
+    Payment.objects.update(
+        client=Subquery(Loan.objects.filter(pk=OuterRef("loan")).values("client")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0012_loan_settled_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="client",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(copy_loan_clients, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="payment",
+            name="client",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="loan",
+            index=models.Index(fields=["client", "id"], name="loan_client_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["client", "id"], name="payment_client_id_idx"),
+        ),
+    ]
@@ -1,11 +1,89 @@
 import uuid
 
 from datetime import date
+from decimal import Decimal
 
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
+from django.db import connections
 from django.db import models
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Subquery
 from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+# What Loan.calculate_remaining_balance reads
+BALANCE_FIELDS = [
+    "nominal_value",
+    "interest_rate",
+    "iof_rate",
+    "request_date",
+    "total_paid",
+]
+PAYMENT_TOTAL_FIELDS = [
+    "total_paid",
+    "payment_count",
+    "last_payment_date",
+    "settled_at",
+]
+
+
+class LoanQuerySet(models.QuerySet):
+    def for_update(self):
+        if connections[self.db].features.has_select_for_update:
+            return self.select_for_update()
+
+        # SQLite has no row locks: writing first takes the database write lock
+        # for the rest of the transaction, before anything is read
+        self.update(payment_count=F("payment_count"))
+        return self
+
+    def get_for_update(self, **kwargs):
+        return self.filter(**kwargs).for_update().get()
+
+    def recount_payments(self):
+        # Recomputes the running totals from the payments, for edits and
+        # deletions, which can't be applied as a plain increment. Each loan's
+        # payments are read from the (loan, payment_date, payment_value) index
+        payments = Payment.objects.filter(loan=OuterRef("pk")).values("loan")
+        count = self.update(
+            total_paid=Coalesce(
+                Subquery(payments.annotate(total=Sum("payment_value")).values("total")),
+                Value(Decimal(0)),
+            ),
+            payment_count=Coalesce(
+                Subquery(payments.annotate(count=Count("pk")).values("count")),
+                Value(0),
+            ),
+            last_payment_date=Subquery(
+                payments.annotate(last=Max("payment_date")).values("last")
+            ),
+        )
+        self.update_settled_at()
+        return count
+
+    def update_settled_at(self):
+        # Sets settled_at to now on the loans left without balance, and clears
+        # it on those with some balance again, e.g. after a payment was
+        # deleted. The balances are computed in Python, building the SQL
+        # expression takes a few milliseconds per query
+        now = timezone.now()
+        loans = self.only(*BALANCE_FIELDS, "settled_at")
+        for loan in loans:
+            settled = loan.calculate_remaining_balance() <= 0
+            if settled != (loan.settled_at is not None):
+                Loan.objects.filter(pk=loan.pk).update(
+                    settled_at=now if settled else None
+                )
 
 
 class Loan(models.Model):
@@ -15,37 +93,268 @@ class Loan(models.Model):
     ip_address = models.GenericIPAddressField()
     request_date = models.DateField(auto_now_add=True)
     bank = models.CharField(max_length=255)
-    client = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Indexed by the (client, request_date) composite index below
+    client = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     iof_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0.0)
 
-    def calculate_remaining_balance(self) -> float:
-        total_payed = (
-            Payment.objects.filter(loan=self).aggregate(Sum("payment_value"))[
-                "payment_value__sum"
-            ]
-            or 0
+    # Running payment totals, maintained by Payment.save
+    total_paid = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, editable=False
+    )
+    payment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_payment_date = models.DateField(null=True, blank=True, editable=False)
+    # When a payment left no balance, maintained by Payment.save. Not the last
+    # payment's date, which is whatever date the client sent
+    settled_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = LoanQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["client", "request_date"], name="loan_client_request_date_idx"
+            ),
+            # A client's loans in the cursor pagination's order, see
+            # IdCursorPagination
+            models.Index(fields=["client", "id"], name="loan_client_id_idx"),
+            # The admin's date hierarchy and its drill-down by date
+            models.Index(fields=["request_date"], name="loan_request_date_idx"),
+            # Loans to archive
+            models.Index(fields=["settled_at"], name="loan_settled_at_idx"),
+        ]
+
+    def calculate_remaining_balance(self, today=None) -> float:
+        return self.compute_remaining_balance(
+            nominal_value=self.nominal_value,
+            interest_rate=self.interest_rate,
+            iof_rate=self.iof_rate,
+            request_date=self.request_date,
+            total_paid=self.total_paid,
+            today=today,
         )
-        days_passed = (date.today() - self.request_date).days
+
+    @staticmethod
+    def compute_remaining_balance(
+        nominal_value, interest_rate, iof_rate, request_date, total_paid, today=None
+    ):
+        days_passed = ((today or date.today()) - request_date).days
         accumulated_rates = (
-            (self.interest_rate / 30) * days_passed * (self.nominal_value - total_payed)
-        )
-        iof_cost = self.iof_rate * self.nominal_value
-        remaining_balance = (
-            self.nominal_value + accumulated_rates + iof_cost - total_payed
+            (interest_rate / 30) * days_passed * (nominal_value - total_paid)
         )
+        iof_cost = iof_rate * nominal_value
+        remaining_balance = nominal_value + accumulated_rates + iof_cost - total_paid
         return round(remaining_balance, 2)
 
     def __str__(self):
         return f"{self.client.username} - {self.id}"
 
 
+class PaymentQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # save isn't called, the payments' clients are copied from their loans
+        # here, with a single query for the loans that aren't cached
+        objs = list(objs)
+        missing = set()
+        for payment in objs:
+            if payment.client_id is None:
+                if Payment.loan.is_cached(payment):
+                    payment.client_id = payment.loan.client_id
+                else:
+                    missing.add(payment.loan_id)
+        if missing:
+            clients = dict(
+                Loan.objects.filter(pk__in=missing).values_list("pk", "client_id")
+            )
+            for payment in objs:
+                if payment.client_id is None:
+                    payment.client_id = clients.get(payment.loan_id)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Payment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    loan = models.ForeignKey(Loan, on_delete=models.CASCADE)
+    # Indexed by the (loan, payment_date, payment_value) composite index below
+    loan = models.ForeignKey(Loan, on_delete=models.CASCADE, db_index=False)
+    # The loan's client, copied so a client's payments are read from the
+    # (client, id) index below without a join. Maintained by save,
+    # bulk_create and a receiver of the loan's post_save
+    client = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_index=False, editable=False
+    )
     payment_date = models.DateField()
     payment_value = models.DecimalField(
         max_digits=10, decimal_places=2, validators=[MinValueValidator(0.0)]
     )
 
+    class Meta:
+        indexes = [
+            # payment_value is part of the key so per-loan sums are answered
+            # from the index alone on every backend
+            models.Index(
+                fields=["loan", "payment_date", "payment_value"],
+                name="payment_loan_date_value_idx",
+            ),
+            models.Index(fields=["payment_date"], name="payment_date_idx"),
+            # A client's payments in the cursor pagination's order, see
+            # IdCursorPagination
+            models.Index(fields=["client", "id"], name="payment_client_id_idx"),
+        ]
+
+    objects = PaymentQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.copy_loan_client()
+        if not self._state.adding:
+            # An edited payment may have moved to another loan, both are
+            # recounted. Deletions are recounted by a post_delete receiver
+            with transaction.atomic():
+                loan_ids = {self.loan_id}
+                loan_ids.update(
+                    Payment.objects.filter(pk=self.pk).values_list("loan_id", flat=True)
+                )
+                super().save(*args, **kwargs)
+                Loan.objects.filter(pk__in=loan_ids).recount_payments()
+            self.refresh_cached_loan()
+            return
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            payment_value = Value(
+                self.payment_value,
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            )
+            payment_date = Value(self.payment_date, output_field=models.DateField())
+            Loan.objects.filter(pk=self.loan_id).update(
+                total_paid=F("total_paid") + payment_value,
+                payment_count=F("payment_count") + 1,
+                last_payment_date=Greatest(
+                    Coalesce("last_payment_date", payment_date), payment_date
+                ),
+            )
+            Loan.objects.filter(pk=self.loan_id).update_settled_at()
+
+        self.refresh_cached_loan()
+
+    def copy_loan_client(self):
+        if Payment.loan.is_cached(self):
+            self.client_id = self.loan.client_id
+        else:
+            self.client_id = Loan.objects.values_list("client_id", flat=True).get(
+                pk=self.loan_id
+            )
+
+    def refresh_cached_loan(self):
+        if Payment.loan.is_cached(self):
+            self.loan.refresh_from_db(fields=PAYMENT_TOTAL_FIELDS)
+
+    def save_within_balance(self):
+        # The loan stays locked from the balance check until the payment is
+        # saved, so concurrent payments can't overpay it
+        with transaction.atomic():
+            loan = Loan.objects.get_for_update(pk=self.loan_id)
+            if self.payment_value > loan.calculate_remaining_balance():
+                raise ValidationError(
+                    "Payment amount greater than remaining balance.",
+                    code="exceeds_balance",
+                )
+            self.save()
+
     def __str__(self):
         return f"{self.loan.client.username} - {self.id}"
+
+
+class LoanBalanceSnapshot(models.Model):
+    # Remaining balance of a loan as of a day, materialized by the
+    # snapshot_balances command so reports don't recompute every loan. A
+    # snapshot is current while its total_paid matches the loan's
+    loan = models.ForeignKey(Loan, on_delete=models.CASCADE, db_index=False)
+    date = models.DateField()
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2)
+    remaining_balance = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            # Also the index reports use to read a day's snapshots
+            models.UniqueConstraint(
+                fields=["date", "loan"], name="snapshot_date_loan_unique"
+            ),
+        ]
+        indexes = [
+            # Per-loan lookups and deletions, e.g. cascading from a loan or
+            # archiving it
+            models.Index(fields=["loan", "date"], name="snapshot_loan_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.loan_id} - {self.date}"
+
+
+class IdempotencyKey(models.Model):
+    # Response to a request sent with an Idempotency-Key header, replayed to
+    # its retries until expires_at, see loans.idempotency. The key and the
+    # request are stored as sha256 digests
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    key = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(encoder=DjangoJSONEncoder)
+    # Purged in batches by the purge_idempotency_keys command
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="idempotency_user_key_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.key}"
+
+
+class ArchivedLoan(models.Model):
+    # A settled loan moved out of Loan, with its ids and values, by the
+    # archive_loans command, see loans.archive. Read-only afterwards
+    id = models.UUIDField(primary_key=True, editable=False)
+    nominal_value = models.DecimalField(max_digits=10, decimal_places=2)
+    interest_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    ip_address = models.GenericIPAddressField()
+    request_date = models.DateField()
+    bank = models.CharField(max_length=255)
+    # Indexed by the (client, request_date) composite index below
+    client = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    iof_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2)
+    payment_count = models.PositiveIntegerField()
+    last_payment_date = models.DateField(null=True, blank=True)
+    settled_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["client", "request_date"],
+                name="archived_loan_client_date_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} - {self.id}"
+
+
+class ArchivedPayment(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)
+    # Indexed by the (loan, payment_date) composite index below
+    loan = models.ForeignKey(ArchivedLoan, on_delete=models.CASCADE, db_index=False)
+    payment_date = models.DateField()
+    payment_value = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["loan", "payment_date"], name="archived_payment_loan_date_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.loan_id} - {self.id}"
@@ -0,0 +1,78 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+from loan_api.database import estimated_row_count
+
+
+class IdCursorPagination(CursorPagination):
+    # Keyset on the primary key, which is unique. A page is a range scan
+    # whatever the size of the table when an index starts with the view's
+    # filter and ends with id, e.g. the (client, id) indexes of loans and
+    # payments. Without one, the filtered rows are sorted on every page
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # paginate_queryset with the page fetched through the async ORM, for the
+        # ascending and unique ordering above
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        order_attr = self.ordering[0]
+        if reverse:
+            queryset = queryset.order_by(f"-{order_attr}")
+        else:
+            queryset = queryset.order_by(order_attr)
+        if current_position is not None:
+            lookup = "lt" if reverse else "gt"
+            queryset = queryset.filter(**{f"{order_attr}__{lookup}": current_position})
+
+        results = [
+            item async for item in queryset[offset : offset + self.page_size + 1]
+        ]
+        self.page = results[: self.page_size]
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        return self.page
+
+
+class EstimatedCountPaginator(Paginator):
+    # Paginator of the admin changelists. COUNT(*) reads a whole table or
+    # index, so the count of an unfiltered changelist is the database's
+    # estimate once the table is big enough for that to matter. Filtered
+    # changelists are counted exactly, their filters narrow the scan
+    exact_count_below = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            connection = connections[queryset.db]
+            estimate = estimated_row_count(connection, queryset.model._meta.db_table)
+            if estimate is not None and estimate >= self.exact_count_below:
+                return estimate
+        return super().count
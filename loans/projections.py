@@ -0,0 +1,90 @@
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+
+from loans.models import Loan
+
+PROJECTION_FIELDS = [
+    "id",
+    "nominal_value",
+    "interest_rate",
+    "iof_rate",
+    "request_date",
+    "total_paid",
+]
+
+# Loan.compute_remaining_balance in cents, scaled by 3000 to stay in integers:
+# 3000 * balance = 3000 * (N - P) + rate * days * (N - P) + 30 * iof * N
+# with N and P in cents and the rates in hundredths of a percent point.
+SCALE = 3000
+HALF = SCALE // 2
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def _hundredths(value) -> int:
+    return int((Decimal(str(value)) * 100).to_integral_value())
+
+
+def project_balances(rows, offsets, today=None):
+    """Projects the remaining balance of many loans over many days at once.
+
+    rows are PROJECTION_FIELDS tuples and offsets are days counted from today.
+    Returns the loan ids and a (loans x offsets) array of balances in cents,
+    equal to Loan.compute_remaining_balance for every loan and day.
+    """
+    today = today or date.today()
+    offsets = np.asarray(offsets, dtype=np.int64)
+    ids = [row[0] for row in rows]
+
+    nominal = np.array([_hundredths(row[1]) for row in rows], dtype=np.int64)
+    rate = np.array([_hundredths(row[2]) for row in rows], dtype=np.int64)
+    iof = np.array([_hundredths(row[3]) for row in rows], dtype=np.int64)
+    age = np.array([(today - row[4]).days for row in rows], dtype=np.int64)
+    paid = np.array([_hundredths(row[5]) for row in rows], dtype=np.int64)
+    if not rows or not len(offsets):
+        return ids, np.zeros((len(rows), len(offsets)), dtype=np.int64)
+
+    outstanding = nominal - paid
+    days = age[:, None] + offsets[None, :]
+
+    # Python integers are exact at any size, only used when int64 could overflow
+    largest = (
+        int(np.abs(rate).max())
+        * int(np.abs(days).max())
+        * int(np.abs(outstanding).max())
+        + SCALE * int(np.abs(outstanding).max())
+        + 30 * int(np.abs(iof).max()) * int(np.abs(nominal).max())
+    )
+    dtype = np.int64 if largest < INT64_MAX else object
+    outstanding = outstanding.astype(dtype)[:, None]
+
+    scaled = (
+        SCALE * outstanding
+        + rate.astype(dtype)[:, None] * days.astype(dtype) * outstanding
+        + (30 * iof.astype(dtype) * nominal.astype(dtype))[:, None]
+    )
+    cents = scaled // SCALE
+    remainder = scaled % SCALE
+    cents = cents + (remainder > HALF)
+
+    # Exact half cents depend on how Decimal rounds rate / 30, those few cells
+    # go through the scalar formula
+    for loan_index, offset_index in zip(*np.nonzero(remainder == HALF)):
+        row = rows[loan_index]
+        balance = Loan.compute_remaining_balance(
+            nominal_value=row[1],
+            interest_rate=row[2],
+            iof_rate=row[3],
+            request_date=row[4],
+            total_paid=row[5],
+            today=today + timedelta(days=int(offsets[offset_index])),
+        )
+        cents[loan_index, offset_index] = _hundredths(balance)
+
+    return ids, cents
+
+
+def projection_offsets(days, step=1):
+    return np.arange(0, days + 1, step, dtype=np.int64)
@@ -1,52 +1,138 @@
+from datetime import date
+from decimal import Decimal
+from functools import cache
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
+from loans.analytics import GROUPS
+from loans.models import ArchivedLoan
+from loans.models import ArchivedPayment
 from loans.models import Loan
 from loans.models import Payment
 
 
+def decimal_to_representation(field):
+    # Decimals read from the database already have the field's places, which
+    # makes quantizing them, most of DecimalField.to_representation, a no-op
+    exponent = -field.decimal_places
+
+    def to_representation(value):
+        if isinstance(value, Decimal) and value.as_tuple().exponent == exponent:
+            return f"{value:f}"
+        return field.to_representation(value)
+
+    return to_representation
+
+
+@cache
+def row_fields(serializer_class):
+    """The readable fields of a serializer as (name, source, to_representation).
+
+    Built once per class: the fields of a ModelSerializer are otherwise
+    introspected from the model for every serializer instance. Related fields
+    take the primary key that values() returns for them.
+    """
+    fields = []
+    for field in serializer_class()._readable_fields:
+        to_representation = field.to_representation
+        if isinstance(field, serializers.RelatedField):
+            to_representation = getattr(field.pk_field, "to_representation", None)
+        elif (
+            isinstance(field, serializers.DecimalField)
+            and field.decimal_places is not None
+            and getattr(
+                field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+            )
+            and not field.localize
+            and not getattr(field, "normalize_output", False)
+        ):
+            to_representation = decimal_to_representation(field)
+        fields.append((field.field_name, field.source, to_representation))
+    return fields
+
+
+def row_values(serializer_class):
+    # values() keys read by RowListSerializer
+    return [source for _, source, _ in row_fields(serializer_class)]
+
+
+class RowListSerializer(serializers.ListSerializer):
+    # Represents the rows of a values() queryset, selected with row_values, as
+    # the child serializer does its instances, without building model instances
+    # or walking their attributes field by field
+    def to_representation(self, data):
+        child = self.child
+        fields = row_fields(type(child))
+        representations = []
+        for row in data:
+            if not isinstance(row, dict):
+                representations.append(child.to_representation(row))
+                continue
+            representation = {}
+            for name, source, to_representation in fields:
+                value = row[source]
+                if value is not None and to_representation is not None:
+                    value = to_representation(value)
+                representation[name] = value
+            representations.append(child.wrap_representation(representation))
+        return representations
+
+
 class LoanSerializer(serializers.ModelSerializer):
     class Meta:
         model = Loan
-        exclude = ["id"]
+        exclude = ["id", "total_paid", "payment_count", "last_payment_date"]
+        list_serializer_class = RowListSerializer
 
     def to_representation(self, instance):
-        representation = super().to_representation(instance)
+        return self.wrap_representation(super().to_representation(instance))
 
-        representation = {"results": representation}
-
-        return representation
+    def wrap_representation(self, representation):
+        return {"results": representation}
 
 
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = ["loan", "payment_date", "payment_value"]
+        list_serializer_class = RowListSerializer
 
-    def validate_payment_value(self, value):
-        loan_id = self.initial_data.get("loan")
-        if not loan_id:
-            raise serializers.ValidationError("Loan is required.")
-
+    def create(self, validated_data):
+        payment = Payment(**validated_data)
         try:
-            loan = Loan.objects.get(pk=loan_id)
-        except Loan.DoesNotExist:
-            raise serializers.ValidationError("Loan does not exist.")
+            payment.save_within_balance()
+        except DjangoValidationError as error:
+            raise serializers.ValidationError({"payment_value": error.messages})
 
-        remaining_balance = loan.calculate_remaining_balance()
+        return payment
 
-        if value > remaining_balance:
-            raise serializers.ValidationError(
-                "Payment amount greater than remaining balance."
-            )
+    def to_representation(self, instance):
+        return self.wrap_representation(super().to_representation(instance))
 
-        return value
+    def wrap_representation(self, representation):
+        return {"results": representation}
 
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
 
-        representation = {"results": representation}
+class ArchivedLoanSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedLoan
+        fields = "__all__"
+
+
+class ArchivedPaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedPayment
+        fields = "__all__"
 
-        return representation
+
+class PaymentRowSerializer(serializers.Serializer):
+    loan = serializers.UUIDField()
+    payment_date = serializers.DateField()
+    payment_value = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0
+    )
 
 
 class RemainingBalanceSerializer(serializers.ModelSerializer):
@@ -58,3 +144,35 @@ class RemainingBalanceSerializer(serializers.ModelSerializer):
 
     def get_remaining_balance(self, obj):
         return obj.calculate_remaining_balance()
+
+
+class BulkRemainingBalanceSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=10000
+    )
+
+
+class SnapshotFilterSerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+
+    def validate_date(self, value):
+        # Snapshots are only taken of past days and today
+        if value > date.today():
+            raise serializers.ValidationError("Date cannot be in the future.")
+        return value
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+
+class ProjectionSerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=0, max_value=3650, default=30)
+    step = serializers.IntegerField(min_value=1, default=1)
+
+
+class AnalyticsSerializer(serializers.Serializer):
+    group_by = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(GROUPS)), required=False
+    )
@@ -0,0 +1,79 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from loans.cache import balance_cache
+from loans.cache import token_cache
+from loans.models import Loan
+from loans.models import LoanBalanceSnapshot
+from loans.models import Payment
+
+
+def invalidate_balance(loan_id):
+    # Outdated right away, so other requests stop reading the old balance, and
+    # again on commit: a balance loaded before the commit and stored after it
+    # has the version from before, see BalanceCache
+    balance_cache.invalidate(loan_id)
+    transaction.on_commit(lambda: balance_cache.invalidate(loan_id))
+
+
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+def invalidate_loan_balance(sender, instance, **kwargs):
+    invalidate_balance(instance.pk)
+
+
+@receiver(post_save, sender=Loan)
+def drop_current_snapshot(sender, instance, created, **kwargs):
+    # An edited rate or value changes today's balance with the same total_paid
+    if not created:
+        LoanBalanceSnapshot.objects.filter(loan=instance, date=date.today()).delete()
+
+
+@receiver(post_save, sender=Loan)
+def copy_client_to_payments(sender, instance, created, **kwargs):
+    # The payments keep a copy of their loan's client, which may have been
+    # edited
+    if not created:
+        Payment.objects.filter(loan=instance).exclude(
+            client_id=instance.client_id
+        ).update(client_id=instance.client_id)
+
+
+@receiver(post_delete, sender=Payment)
+def recount_loan_payments(sender, instance, origin=None, **kwargs):
+    # Not when the loan itself is being deleted, its payments go with it
+    if isinstance(origin, Loan) or getattr(origin, "model", None) is Loan:
+        return
+    Loan.objects.filter(pk=instance.loan_id).recount_payments()
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_payment_balance(sender, instance, **kwargs):
+    invalidate_balance(instance.loan_id)
+
+
+def invalidate_tokens(token_keys):
+    # Same as invalidate_balance, a token being authenticated meanwhile can't
+    # put the old user back in the cache
+    token_cache.invalidate_many(token_keys)
+    transaction.on_commit(lambda: token_cache.invalidate_many(token_keys))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    # Covers deactivation, and keeps the cached user in sync with the row
+    invalidate_tokens(
+        list(Token.objects.filter(user=instance).values_list("key", flat=True))
+    )
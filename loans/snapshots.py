@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.db.models import Exists
+from django.db.models import OuterRef
+
+from loans.models import Loan
+from loans.models import LoanBalanceSnapshot
+from loans.projections import PROJECTION_FIELDS
+from loans.projections import project_balances
+
+
+def current_snapshots(day):
+    # Snapshots of the day taken after the loan's last payment, to be used in
+    # a Loan queryset
+    return LoanBalanceSnapshot.objects.filter(
+        loan=OuterRef("pk"), date=day, total_paid=OuterRef("total_paid")
+    )
+
+
+def loans_to_snapshot(day):
+    return Loan.objects.filter(request_date__lte=day).exclude(
+        Exists(current_snapshots(day))
+    )
+
+
+def snapshot_balances(day, batch_size=2000):
+    """Materializes the balance of day for loans without a current snapshot.
+
+    Loans that already have one are skipped, so the first run of a day writes
+    every loan and later runs only the ones paid since. Every batch is upserted
+    and committed on its own, an interrupted run resumes where it stopped.
+    Yields the number of loans written per batch.
+    """
+    pending = loans_to_snapshot(day).order_by("pk").values_list(*PROJECTION_FIELDS)
+    last_pk = None
+    while True:
+        batch = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+        rows = list(batch[:batch_size])
+        if not rows:
+            return
+
+        ids, cents = project_balances(rows, [0], today=day)
+        LoanBalanceSnapshot.objects.bulk_create(
+            [
+                LoanBalanceSnapshot(
+                    loan_id=loan_id,
+                    date=day,
+                    total_paid=row[5],
+                    remaining_balance=Decimal(int(balance[0])).scaleb(-2),
+                )
+                for loan_id, row, balance in zip(ids, rows, cents)
+            ],
+            update_conflicts=True,
+            unique_fields=["date", "loan"],
+            update_fields=["total_paid", "remaining_balance"],
+        )
+        last_pk = ids[-1]
+        yield len(rows)
+
+
+def prune_snapshots(before, batch_size=5000):
+    """Deletes snapshots older than before, yielding the number deleted per batch.
+
+    Each batch is a range of the (date, loan) index and a delete by primary
+    key, committed on its own, as purge_expired_keys does.
+    """
+    expired = LoanBalanceSnapshot.objects.filter(date__lt=before).order_by("date")
+    while True:
+        ids = list(expired.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return
+        deleted, _ = LoanBalanceSnapshot.objects.filter(id__in=ids).delete()
+        yield deleted
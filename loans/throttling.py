@@ -0,0 +1,106 @@
+import math
+
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+THROTTLE_CACHE_ALIAS = "throttle"
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token bucket per cache key, shared by every worker using the cache.
+
+    A rate of "N/period" refills N tokens evenly over the period and holds at
+    most N, so a client can make N requests at once and then one every
+    period/N seconds. The bucket is stored as the time it will be full again,
+    in milliseconds, under a key expiring at that time: an idle client has no
+    key at all. Requests move that time forward with cache.add and cache.incr,
+    which are atomic, and throttled requests move it back, so they don't use
+    up tokens.
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    @property
+    def cache(self):
+        return caches[THROTTLE_CACHE_ALIAS]
+
+    def get_rate(self):
+        # Read when the throttle is created instead of when the class is, so
+        # rates follow settings changes
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cache = self.cache
+        interval = max(self.duration * 1000 // self.num_requests, 1)
+        now = int(self.timer() * 1000)
+        if cache.add(self.key, now + interval, self.timeout(interval)):
+            return True
+
+        try:
+            full_at = cache.incr(self.key, interval)
+        except ValueError:
+            # Expired since the add, the bucket just filled up
+            cache.add(self.key, now + interval, self.timeout(interval))
+            return True
+
+        # Past num_requests intervals ahead, the bucket had no token left
+        self.wait_ms = full_at - now - self.num_requests * interval
+        if self.wait_ms > 0:
+            cache.decr(self.key, interval)
+            return False
+
+        cache.touch(self.key, self.timeout(full_at - now))
+        return True
+
+    def timeout(self, milliseconds):
+        # Whole seconds on most backends: a bucket can look full up to a
+        # second early, never late
+        return math.ceil(milliseconds / 1000)
+
+    def wait(self):
+        return self.wait_ms / 1000
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    # Every request of a user, or of an IP address for anonymous requests
+    scope = "user"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class ScopedTokenBucketThrottle(UserTokenBucketThrottle):
+    # Requests of a user to the views sharing a throttle_scope. A rate for
+    # "<scope>.<method>", e.g. "payments.post", takes precedence over the
+    # rate of the scope for that method
+    scope_attr = "throttle_scope"
+
+    def __init__(self):
+        # The scope and the rate depend on the view and the method
+        pass
+
+    def allow_request(self, request, view):
+        scope = getattr(view, self.scope_attr, None)
+        if not scope:
+            return True
+
+        method_scope = f"{scope}.{request.method.lower()}"
+        if method_scope in api_settings.DEFAULT_THROTTLE_RATES:
+            scope = method_scope
+        self.scope = scope
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
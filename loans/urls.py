@@ -1,15 +1,67 @@
+from django.conf import settings
 from django.urls import path
 
+from loans import async_views
+from loans.views import ArchivedLoanListView
+from loans.views import ArchivedPaymentListView
+from loans.views import BalanceProjectionView
+from loans.views import BulkRemainingBalanceView
+from loans.views import LoanExportView
 from loans.views import LoanListCreateView
+from loans.views import PaymentBulkCreateView
+from loans.views import PaymentExportView
 from loans.views import PaymentListCreateView
+from loans.views import PortfolioAnalyticsView
 from loans.views import RemainingBalanceView
 
+if settings.ASYNC_VIEWS:
+    # Reads run on the async ORM, writes still go through the DRF views
+    loan_list_view = async_views.loan_list
+    payment_list_view = async_views.payment_list
+    remaining_balance_view = async_views.remaining_balance
+else:
+    loan_list_view = LoanListCreateView.as_view()
+    payment_list_view = PaymentListCreateView.as_view()
+    remaining_balance_view = RemainingBalanceView.as_view()
+
 urlpatterns = [
-    path("loans/", LoanListCreateView.as_view(), name="loans"),
-    path("payments/", PaymentListCreateView.as_view(), name="payments"),
+    path("loans/", loan_list_view, name="loans"),
+    path(
+        "loans/export.<str:export_format>",
+        LoanExportView.as_view(),
+        name="loans-export",
+    ),
+    path(
+        "loans/analytics/",
+        PortfolioAnalyticsView.as_view(),
+        name="loans-analytics",
+    ),
+    path(
+        "loans/projection/",
+        BalanceProjectionView.as_view(),
+        name="loans-projection",
+    ),
+    path("payments/", payment_list_view, name="payments"),
+    path("payments/bulk/", PaymentBulkCreateView.as_view(), name="payments-bulk"),
+    path(
+        "payments/export.<str:export_format>",
+        PaymentExportView.as_view(),
+        name="payments-export",
+    ),
+    path(
+        "remaining_balance/",
+        BulkRemainingBalanceView.as_view(),
+        name="remaining-balance-bulk",
+    ),
     path(
         "remaining_balance/<uuid:id>/",
-        RemainingBalanceView.as_view(),
+        remaining_balance_view,
         name="remaining-balance",
     ),
+    path("archive/loans/", ArchivedLoanListView.as_view(), name="archived-loans"),
+    path(
+        "archive/payments/",
+        ArchivedPaymentListView.as_view(),
+        name="archived-payments",
+    ),
 ]
@@ -1,13 +1,43 @@
+from datetime import date
+from datetime import timedelta
+
+from django.db.models import Subquery
+from django.http import Http404
+from django.http import StreamingHttpResponse
 from rest_framework import generics
 from rest_framework import status
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
+from loans.analytics import portfolio_totals
+from loans.cache import balance_cache
+from loans.exports import EXPORT_FORMATS
+from loans.idempotency import IdempotentCreateMixin
+from loans.ingestion import ingest_payments
+from loans.models import ArchivedLoan
+from loans.models import ArchivedPayment
 from loans.models import Loan
+from loans.models import LoanBalanceSnapshot
 from loans.models import Payment
+from loans.parsers import NDJSONParser
+from loans.projections import PROJECTION_FIELDS
+from loans.projections import project_balances
+from loans.projections import projection_offsets
+from loans.serializers import AnalyticsSerializer
+from loans.serializers import ArchivedLoanSerializer
+from loans.serializers import ArchivedPaymentSerializer
+from loans.serializers import BulkRemainingBalanceSerializer
+from loans.serializers import ExportFilterSerializer
 from loans.serializers import LoanSerializer
 from loans.serializers import PaymentSerializer
+from loans.serializers import ProjectionSerializer
 from loans.serializers import RemainingBalanceSerializer
+from loans.serializers import SnapshotFilterSerializer
+from loans.serializers import row_values
+from loans.snapshots import current_snapshots
 
 
 class LoanListCreateView(generics.ListCreateAPIView):
@@ -18,42 +48,296 @@ class LoanListCreateView(generics.ListCreateAPIView):
         serializer.save(client=self.request.user)
 
     def get_queryset(self):
-        return Loan.objects.filter(client=self.request.user)
+        # Pages are serialized from plain rows, see RowListSerializer
+        return Loan.objects.filter(client=self.request.user).values(
+            "id", *row_values(LoanSerializer)
+        )
 
 
-class PaymentListCreateView(generics.ListCreateAPIView):
+class PaymentListCreateView(IdempotentCreateMixin, generics.ListCreateAPIView):
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    # Creating payments locks the database, see the "payments.post" rate
+    throttle_scope = "payments"
 
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
-        return Response(
-            serializer.data, status=status.HTTP_201_CREATED, headers=headers
+    def get_queryset(self):
+        # Pages are serialized from plain rows, see RowListSerializer
+        return Payment.objects.filter(client=self.request.user).values(
+            "id", *row_values(PaymentSerializer)
         )
 
-    def get_queryset(self):
-        return Payment.objects.filter(loan__client=self.request.user)
+
+class PaymentBulkCreateView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "payments_bulk"
+    parser_classes = [JSONParser, NDJSONParser]
+    max_rows = 50000
+
+    def post(self, request, *args, **kwargs):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"error": "Expected a non-empty list of payments"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(rows) > self.max_rows:
+            return Response(
+                {"error": f"A batch can have at most {self.max_rows} payments"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        report = ingest_payments(rows)
+        accepted = sum(1 for row in report if row["status"] == "accepted")
+
+        return Response(
+            {
+                "accepted": accepted,
+                "rejected": len(report) - accepted,
+                "results": report,
+            }
+        )
 
 
 class RemainingBalanceView(generics.RetrieveAPIView):
     serializer_class = RemainingBalanceSerializer
     queryset = Loan.objects.all()
     lookup_field = "id"
+    throttle_scope = "remaining_balance"
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
+        loan_id = kwargs[self.lookup_field]
+        cached, version = balance_cache.lookup(loan_id)
+        if cached is None:
+            instance = self.get_object()
+            serializer = self.get_serializer(instance)
+            cached = {"client_id": instance.client_id, "data": dict(serializer.data)}
+            balance_cache.set(loan_id, cached, version)
 
         # Checks if the loan belongs to the authenticated user
-        if instance.client != request.user:
+        if cached["client_id"] != request.user.pk:
             return Response(
                 {"error": "You do not have permission to access the resource"},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        serializer = self.get_serializer(instance)
-        data = serializer.data
+        return Response(cached["data"])
+
+
+class BulkRemainingBalanceView(generics.GenericAPIView):
+    serializer_class = BulkRemainingBalanceSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "remaining_balance"
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        filters = SnapshotFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        day = filters.validated_data.get("date")
+        if day is not None and day != date.today():
+            return self.stream_balances(self.get_snapshot_queryset(day))
+        return self.stream_balances(self.get_queryset())
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = self.get_queryset().filter(id__in=serializer.validated_data["ids"])
+        return self.stream_balances(queryset)
+
+    def get_queryset(self):
+        # Reads today's snapshot when it's current, computes the others
+        snapshot_balance = Subquery(
+            current_snapshots(date.today()).values("remaining_balance")[:1]
+        )
+        return (
+            Loan.objects.filter(client=self.request.user)
+            .order_by("id")
+            .values_list(*PROJECTION_FIELDS, snapshot_balance)
+        )
+
+    def get_snapshot_queryset(self, day):
+        # Past balances only exist as snapshots, loans without one are left out
+        return (
+            LoanBalanceSnapshot.objects.filter(loan__client=self.request.user, date=day)
+            .order_by("loan_id")
+            .values_list(
+                "loan_id",
+                "loan__nominal_value",
+                "loan__interest_rate",
+                "loan__iof_rate",
+                "loan__request_date",
+                "total_paid",
+                "remaining_balance",
+            )
+        )
+
+    def stream_balances(self, queryset):
+        return StreamingHttpResponse(
+            self.iter_balances(queryset), content_type="application/json"
+        )
+
+    def iter_balances(self, queryset):
+        fields = RemainingBalanceSerializer().fields
+        encoder = JSONEncoder()
+        today = date.today()
+
+        yield "["
+        separator = ""
+        for row in queryset.iterator(chunk_size=self.chunk_size):
+            (
+                loan_id,
+                nominal_value,
+                interest_rate,
+                iof_rate,
+                request_date,
+                total_paid,
+                remaining_balance,
+            ) = row
+            if remaining_balance is None:
+                remaining_balance = Loan.compute_remaining_balance(
+                    nominal_value=nominal_value,
+                    interest_rate=interest_rate,
+                    iof_rate=iof_rate,
+                    request_date=request_date,
+                    total_paid=total_paid,
+                    today=today,
+                )
+            item = {
+                "id": fields["id"].to_representation(loan_id),
+                "nominal_value": fields["nominal_value"].to_representation(
+                    nominal_value
+                ),
+                "request_date": fields["request_date"].to_representation(request_date),
+                "remaining_balance": remaining_balance,
+            }
+            yield separator + encoder.encode(item)
+            separator = ","
+        yield "]"
+
+
+class BalanceProjectionView(generics.GenericAPIView):
+    serializer_class = ProjectionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        today = date.today()
+        offsets = projection_offsets(**serializer.validated_data)
+        rows = list(self.get_queryset().values_list(*PROJECTION_FIELDS))
+        ids, cents = project_balances(rows, offsets, today=today)
+
+        return Response(
+            {
+                "dates": [today + timedelta(days=int(offset)) for offset in offsets],
+                "results": [
+                    {"id": loan_id, "balances": (balances / 100).tolist()}
+                    for loan_id, balances in zip(ids, cents)
+                ],
+            }
+        )
+
+    def get_queryset(self):
+        return Loan.objects.filter(client=self.request.user).order_by("id")
+
+
+class PortfolioAnalyticsView(generics.GenericAPIView):
+    # Totals of every client's loans, for the operations staff
+    serializer_class = AnalyticsSerializer
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        group_by = list(dict.fromkeys(serializer.validated_data.get("group_by", [])))
+        today = date.today()
+        return Response(
+            {
+                "date": today,
+                "group_by": group_by,
+                "results": portfolio_totals(group_by=group_by, today=today),
+            }
+        )
+
+
+class ExportView(generics.GenericAPIView):
+    serializer_class = ExportFilterSerializer
+    permission_classes = [IsAuthenticated]
+    columns: list = []
+    date_field = ""
+    filename = ""
+    chunk_size = 2000
+
+    def get(self, request, export_format, *args, **kwargs):
+        try:
+            content_type, iter_rows = EXPORT_FORMATS[export_format]
+        except KeyError:
+            raise Http404
+
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+
+        queryset = self.get_queryset()
+        if "start_date" in filters:
+            queryset = queryset.filter(
+                **{f"{self.date_field}__gte": filters["start_date"]}
+            )
+        if "end_date" in filters:
+            queryset = queryset.filter(
+                **{f"{self.date_field}__lte": filters["end_date"]}
+            )
+
+        rows = queryset.values_list(*self.columns).iterator(chunk_size=self.chunk_size)
+        response = StreamingHttpResponse(
+            iter_rows(self.columns, rows), content_type=content_type
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{self.filename}.{export_format}"'
+        return response
+
+
+class LoanExportView(ExportView):
+    columns = [
+        "id",
+        "nominal_value",
+        "interest_rate",
+        "iof_rate",
+        "ip_address",
+        "request_date",
+        "bank",
+        "client",
+    ]
+    date_field = "request_date"
+    filename = "loans"
+
+    def get_queryset(self):
+        return Loan.objects.filter(client=self.request.user).order_by("id")
+
+
+class PaymentExportView(ExportView):
+    columns = ["id", "loan", "payment_date", "payment_value"]
+    date_field = "payment_date"
+    filename = "payments"
+
+    def get_queryset(self):
+        return Payment.objects.filter(client=self.request.user).order_by("id")
+
+
+class ArchivedLoanListView(generics.ListAPIView):
+    # Loans moved out of the hot tables by archive_loans, read-only
+    serializer_class = ArchivedLoanSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ArchivedLoan.objects.filter(client=self.request.user)
+
 
-        return Response(data)
+class ArchivedPaymentListView(generics.ListAPIView):
+    serializer_class = ArchivedPaymentSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ArchivedPayment.objects.filter(loan__client=self.request.user)
@@ -0,0 +1,57 @@
+#!/usr/bin/env bash
+# Compares requests/sec of the WSGI path (sync views) and the ASGI path (async
+# read views) under the same uvicorn server and load.
+#
+#   python manage.py seed_loans --tokens-file tokens.json
+#   ./scripts/benchmark-asgi.sh tokens.json
+
+set -e
+
+TOKENS_FILE=${1:-tokens.json}
+PORT=${BENCHMARK_PORT:-8765}
+CONCURRENCY=${BENCHMARK_CONCURRENCY:-64}
+DURATION=${BENCHMARK_DURATION:-30}
+OUTPUT_DIR=${BENCHMARK_OUTPUT_DIR:-.benchmarks}
+
+export DJANGO_DEBUG=
+export DJANGO_ALLOWED_HOSTS=localhost
+
+mkdir -p "$OUTPUT_DIR"
+
+run() {
+    name=$1
+    shift
+    uvicorn "$@" --port "$PORT" --log-level warning &
+    server=$!
+    trap 'kill $server 2>/dev/null' EXIT
+    sleep 3
+
+    python scripts/load_test.py \
+        --base-url "http://localhost:$PORT/api/v1/" \
+        --tokens-file "$TOKENS_FILE" \
+        --concurrency "$CONCURRENCY" \
+        --duration "$DURATION" \
+        --output "$OUTPUT_DIR/$name.json" > /dev/null
+
+    kill $server
+    wait $server 2>/dev/null || true
+}
+
+DJANGO_ASYNC_VIEWS= run wsgi --interface wsgi loan_api.wsgi:application
+run asgi --interface asgi3 loan_api.asgi:application
+
+python - "$OUTPUT_DIR" <<'EOF'
+import json
+import sys
+
+wsgi, asgi = (
+    json.load(open(f"{sys.argv[1]}/{name}.json"))["endpoints"]
+    for name in ("wsgi", "asgi")
+)
+print(f"{'endpoint':20} {'wsgi rps':>10} {'asgi rps':>10} {'wsgi p99':>10} {'asgi p99':>10}")
+for name in wsgi:
+    print(
+        f"{name:20} {wsgi[name]['rps']:>10} {asgi[name]['rps']:>10} "
+        f"{wsgi[name]['p99_ms']:>10} {asgi[name]['p99_ms']:>10}"
+    )
+EOF
@@ -0,0 +1,69 @@
+#!/usr/bin/env bash
+# Compares the throughput of runserver and the gunicorn profiles of
+# gunicorn_config.py under the same load.
+#
+#   python manage.py seed_loans --tokens-file tokens.json
+#   docker compose up -d redis
+#   REDIS_URL=redis://localhost:6379/0 ./scripts/benchmark-server.sh tokens.json
+#
+# The gunicorn workers refuse to start without a shared throttle cache.
+
+set -e
+
+: "${REDIS_URL:?set REDIS_URL to a Redis the gunicorn workers share}"
+
+TOKENS_FILE=${1:-tokens.json}
+PORT=${BENCHMARK_PORT:-8765}
+CONCURRENCY=${BENCHMARK_CONCURRENCY:-64}
+DURATION=${BENCHMARK_DURATION:-30}
+OUTPUT_DIR=${BENCHMARK_OUTPUT_DIR:-.benchmarks}
+
+export DJANGO_DEBUG=
+export DJANGO_ALLOWED_HOSTS=localhost
+export DJANGO_BIND_ADDRESS=127.0.0.1
+export DJANGO_BIND_PORT=$PORT
+
+mkdir -p "$OUTPUT_DIR"
+
+run() {
+    name=$1
+    shift
+    "$@" > /dev/null 2>&1 &
+    server=$!
+    trap 'kill $server 2>/dev/null' EXIT
+    sleep 4
+
+    python scripts/load_test.py \
+        --base-url "http://localhost:$PORT/api/v1/" \
+        --tokens-file "$TOKENS_FILE" \
+        --concurrency "$CONCURRENCY" \
+        --duration "$DURATION" \
+        --output "$OUTPUT_DIR/$name.json" > /dev/null
+
+    kill $server
+    wait $server 2>/dev/null || true
+}
+
+run runserver python manage.py runserver --noreload "127.0.0.1:$PORT"
+run gunicorn gunicorn -c gunicorn_config.py
+GUNICORN_WORKER_CLASS=uvicorn run gunicorn-uvicorn gunicorn -c gunicorn_config.py
+
+python - "$OUTPUT_DIR" <<'EOF'
+import json
+import sys
+
+servers = ("runserver", "gunicorn", "gunicorn-uvicorn")
+results = {
+    server: json.load(open(f"{sys.argv[1]}/{server}.json"))["endpoints"]
+    for server in servers
+}
+print(f"{'rps / p99 ms':20}" + "".join(f"{server:>22}" for server in servers))
+for endpoint in results["runserver"]:
+    print(
+        f"{endpoint:20}"
+        + "".join(
+            f"{results[server][endpoint]['rps']:>12} / {results[server][endpoint]['p99_ms']:>7}"
+            for server in servers
+        )
+    )
+EOF
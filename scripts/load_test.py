@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""Load test for the loan API, runs against any server on localhost.
+
+    python manage.py seed_loans --tokens-file tokens.json
+    python manage.py runserver --noreload  # or any WSGI/ASGI server
+    python scripts/load_test.py --tokens-file tokens.json --output run.json
+    python scripts/load_test.py --tokens-file tokens.json --compare run.json
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request
+from urllib.request import urlopen
+
+# Relative weights, most clients check a balance and sometimes list their data
+SCENARIO = {
+    "loans": (3, lambda session: "loans/"),
+    "payments": (2, lambda session: "payments/"),
+    "remaining_balance": (
+        5,
+        lambda session: f"remaining_balance/{random.choice(session['loans'])}/",
+    ),
+}
+
+
+def get(base_url, path, token, timeout=30):
+    request = Request(base_url + path, headers={"Authorization": f"Token {token}"})
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except HTTPError as error:
+        return error.code
+
+
+def open_sessions(base_url, tokens, count):
+    sessions = []
+    for token in random.sample(tokens, min(count, len(tokens))):
+        request = Request(
+            base_url + "remaining_balance/",
+            headers={"Authorization": f"Token {token}"},
+        )
+        with urlopen(request) as response:
+            loans = [balance["id"] for balance in json.load(response)]
+        if loans:
+            sessions.append({"token": token, "loans": loans})
+    return sessions
+
+
+def run(base_url, sessions, duration, concurrency):
+    names = list(SCENARIO)
+    weights = [SCENARIO[name][0] for name in names]
+    timings = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        while time.monotonic() < deadline:
+            session = random.choice(sessions)
+            name = random.choices(names, weights)[0]
+            started = time.perf_counter()
+            status = get(base_url, SCENARIO[name][1](session), session["token"])
+            elapsed = time.perf_counter() - started
+            with lock:
+                timings[name].append(elapsed)
+                if status >= 400:
+                    errors[name] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+
+    return summarize(timings, errors, duration)
+
+
+def summarize(timings, errors, duration):
+    results = {}
+    for name, samples in timings.items():
+        if len(samples) < 2:
+            continue
+        percentiles = statistics.quantiles(samples, n=100, method="inclusive")
+        results[name] = {
+            "requests": len(samples),
+            "errors": errors[name],
+            "rps": round(len(samples) / duration, 2),
+            "p50_ms": round(percentiles[49] * 1000, 3),
+            "p99_ms": round(percentiles[98] * 1000, 3),
+        }
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            limit = baseline[name][metric] * (1 + threshold)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{name} {metric}: {result[metric]} > {limit:.3f} "
+                    f"(baseline {baseline[name][metric]})"
+                )
+        if result["errors"] > baseline[name]["errors"]:
+            regressions.append(
+                f"{name} errors: {result['errors']} > {baseline[name]['errors']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1/")
+    parser.add_argument("--tokens-file", required=True)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Writes the results as JSON")
+    parser.add_argument("--compare", help="Results JSON of a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed latency increase over --compare, 0.2 is 20%%",
+    )
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with open(args.tokens_file) as tokens_file:
+        tokens = json.load(tokens_file)
+
+    sessions = open_sessions(args.base_url, tokens, args.sessions)
+    if not sessions:
+        sys.exit("None of the tokens has loans, run manage.py seed_loans first.")
+
+    results = run(args.base_url, sessions, args.duration, args.concurrency)
+    report = {
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "endpoints": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["endpoints"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            sys.exit("Regressions found:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,4 +2,13 @@
 
 set -e
 
-pytest -xvvv tests/
\ No newline at end of file
+# One worker per CPU (PYTEST_WORKERS=0 runs serially), each with its own test
+# database, kept between runs. Prints the slowest tests and the wall time
+started_at=$(date +%s)
+
+pytest -xv tests/. \
+    --numprocesses "${PYTEST_WORKERS:-auto}" \
+    --reuse-db \
+    --durations 20
+
+echo "Test suite wall time: $(( $(date +%s) - started_at ))s"
@@ -1,6 +1,11 @@
 #!/usr/bin/env bash
+# Migrations are a separate step, run scripts/migrate.sh before starting.
+# DJANGO_SERVER=runserver starts Django's development server instead.
 
-python manage.py makemigrations
-python manage.py migrate
+set -e
 
-python manage.py runserver ${DJANGO_BIND_ADDRESS}:${DJANGO_BIND_PORT}
\ No newline at end of file
+if [ "$DJANGO_SERVER" = "runserver" ]; then
+    exec python manage.py runserver ${DJANGO_BIND_ADDRESS}:${DJANGO_BIND_PORT}
+fi
+
+exec gunicorn -c gunicorn_config.py
@@ -0,0 +1,58 @@
+import os
+
+from io import StringIO
+
+import pytest
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Count
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from loans.models import Loan
+
+# 1.0 seeds 1000 users, 100k loans and 1M payments, the default keeps a local
+# run around a minute
+SCALE = float(os.getenv("BENCHMARK_SCALE", "0.01"))
+PREFIX = "benchmark-user"
+
+
+@pytest.fixture(scope="session")
+def seeded_data(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        call_command(
+            "seed_loans",
+            users=max(int(1000 * SCALE), 1),
+            loans=max(int(100000 * SCALE), 1),
+            payments=int(1000000 * SCALE),
+            prefix=PREFIX,
+            stdout=StringIO(),
+        )
+        yield
+        User.objects.filter(username__startswith=PREFIX).delete()
+
+
+@pytest.fixture
+def busiest_user(seeded_data):
+    # The user with most loans is the worst case for the list endpoints
+    return (
+        User.objects.filter(username__startswith=PREFIX)
+        .annotate(loan_count=Count("loan"))
+        .order_by("-loan_count")
+        .first()
+    )
+
+
+@pytest.fixture
+def client(busiest_user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Token {Token.objects.get(user=busiest_user).key}"
+    )
+    return client
+
+
+@pytest.fixture
+def busiest_loan(busiest_user):
+    return Loan.objects.filter(client=busiest_user).order_by("-payment_count").first()
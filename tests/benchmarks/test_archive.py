@@ -0,0 +1,86 @@
+import os
+import uuid
+
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from loans.archive import archive_settled_loans
+from loans.models import Loan
+from loans.models import Payment
+
+pytestmark = [pytest.mark.benchmark(group="archive"), pytest.mark.django_db]
+
+# 1.0 creates 100k loans with 10 payments each, 90% of them settled
+SCALE = float(os.getenv("BENCHMARK_SCALE", "0.01"))
+USERS = 10
+PAYMENTS_PER_LOAN = 10
+
+
+@pytest.fixture
+def history(create_user):
+    users = [create_user(f"archive-user{index}") for index in range(USERS)]
+    settled_on = date.today() - timedelta(days=200)
+    settled_at = timezone.now() - timedelta(days=200)
+    loans = []
+    payments = []
+    for index in range(max(int(100000 * SCALE), USERS)):
+        settled = index // USERS % 10 != 0
+        loan = Loan(
+            id=uuid.uuid4(),
+            nominal_value=Decimal("1000"),
+            interest_rate=0,
+            ip_address="127.0.0.1",
+            bank="Banco Teste",
+            client=users[index % USERS],
+            total_paid=Decimal("1000") if settled else Decimal("500"),
+            payment_count=PAYMENTS_PER_LOAN,
+            last_payment_date=settled_on,
+            settled_at=settled_at if settled else None,
+        )
+        loans.append(loan)
+        payments.extend(
+            Payment(
+                loan=loan,
+                payment_date=settled_on - timedelta(days=day),
+                payment_value=loan.total_paid / PAYMENTS_PER_LOAN,
+            )
+            for day in range(PAYMENTS_PER_LOAN)
+        )
+    Loan.objects.bulk_create(loans, batch_size=2000)
+    Payment.objects.bulk_create(payments, batch_size=2000)
+
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=users[0]).key}"
+    )
+    return client
+
+
+@pytest.mark.parametrize("archived", [False, True], ids=["hot", "archived"])
+@pytest.mark.parametrize("url", ["payments", "payments-export"])
+def test_payment_history(benchmark, history, archived, url):
+    if archived:
+        list(archive_settled_loans(30))
+    kwargs = {"export_format": "csv"} if url == "payments-export" else {}
+    path = reverse(url, kwargs=kwargs)
+
+    def get():
+        response = history.get(path)
+        assert response.status_code == 200
+        if response.streaming:
+            # Reads the whole export
+            return b"".join(response.streaming_content)
+        return response.content
+
+    benchmark.pedantic(get, rounds=20, warmup_rounds=2)
+    benchmark.extra_info.update(
+        {"hot_loans": Loan.objects.count(), "hot_payments": Payment.objects.count()}
+    )
@@ -0,0 +1,63 @@
+import statistics
+
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from loans.cache import balance_cache
+
+pytestmark = [pytest.mark.benchmark(group="endpoints"), pytest.mark.django_db]
+
+
+def run_endpoint(benchmark, client, url, setup=None):
+    if setup:
+        setup()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+
+    benchmark.pedantic(client.get, args=(url,), setup=setup, rounds=50, warmup_rounds=2)
+
+    timings = sorted(benchmark.stats.stats.data)
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    benchmark.extra_info.update(
+        {
+            "queries": len(queries),
+            "p50_ms": round(percentiles[49] * 1000, 3),
+            "p99_ms": round(percentiles[98] * 1000, 3),
+        }
+    )
+    return len(queries)
+
+
+def test_loan_list(benchmark, client):
+    queries = run_endpoint(benchmark, client, reverse("loans"))
+
+    assert queries <= 3
+
+
+def test_payment_list(benchmark, client):
+    queries = run_endpoint(benchmark, client, reverse("payments"))
+
+    assert queries <= 3
+
+
+def test_remaining_balance(benchmark, client, busiest_loan):
+    url = reverse("remaining-balance", kwargs={"id": busiest_loan.id})
+
+    queries = run_endpoint(
+        benchmark, client, url, setup=lambda: balance_cache.invalidate(busiest_loan.id)
+    )
+
+    assert queries <= 3
+
+
+def test_remaining_balance_cached(benchmark, client, busiest_loan):
+    url = reverse("remaining-balance", kwargs={"id": busiest_loan.id})
+    client.get(url)
+
+    queries = run_endpoint(benchmark, client, url)
+
+    assert queries <= 2
@@ -0,0 +1,36 @@
+import pytest
+
+from drf_yasg.views import get_schema_view
+from rest_framework.test import APIRequestFactory
+
+from loan_api.schema import INFO
+from loan_api.schema import schema_view
+
+pytestmark = pytest.mark.benchmark(group="schema")
+
+# The schema view the docs were served by: the schema is generated on every
+# request
+generated_view = get_schema_view(INFO, public=True).without_ui(cache_timeout=0)
+
+
+def run_schema_view(benchmark, view):
+    request = APIRequestFactory().get("/swagger.json")
+
+    def get():
+        response = view(request, format=".json")
+        # DRF responses are rendered by the handler, after the view
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    response = benchmark.pedantic(get, rounds=20, warmup_rounds=1)
+    assert response.status_code == 200
+    return response
+
+
+def test_generated_schema(benchmark):
+    run_schema_view(benchmark, generated_view)
+
+
+def test_cached_schema(benchmark):
+    run_schema_view(benchmark, schema_view)
@@ -0,0 +1,94 @@
+import pytest
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+
+from loan_api.renderers import FastJSONRenderer
+from loans.models import Loan
+from loans.models import Payment
+from loans.serializers import LoanSerializer
+from loans.serializers import PaymentSerializer
+from loans.serializers import row_values
+
+pytestmark = [pytest.mark.benchmark(group="serialization"), pytest.mark.django_db]
+
+# A full page of the list endpoints
+ROWS = 1000
+
+
+def run_serialization(benchmark, serializer_class, items, renderer):
+    # Serializes and renders a page as the list endpoints do, rows/sec in
+    # extra_info. The page is fetched beforehand: only Python work is measured
+    def render():
+        return renderer.render(serializer_class(items, many=True).data)
+
+    benchmark.pedantic(render, rounds=20, warmup_rounds=2)
+    benchmark.extra_info["rows_per_sec"] = round(
+        len(items) / benchmark.stats.stats.mean
+    )
+    return render()
+
+
+@pytest.fixture
+def loans(seeded_data):
+    return Loan.objects.order_by("id")[:ROWS]
+
+
+@pytest.fixture
+def payments(seeded_data):
+    return Payment.objects.order_by("id")[:ROWS]
+
+
+class InstanceLoanSerializer(LoanSerializer):
+    # LoanSerializer with DRF's ListSerializer, as the list endpoints were
+    class Meta(LoanSerializer.Meta):
+        list_serializer_class = ListSerializer
+
+
+class InstancePaymentSerializer(PaymentSerializer):
+    class Meta(PaymentSerializer.Meta):
+        list_serializer_class = ListSerializer
+
+
+def test_loan_instances(benchmark, loans):
+    run_serialization(
+        benchmark,
+        InstanceLoanSerializer,
+        list(loans.defer("total_paid", "payment_count", "last_payment_date")),
+        JSONRenderer(),
+    )
+
+
+def test_loan_rows(benchmark, loans):
+    rendered = run_serialization(
+        benchmark,
+        LoanSerializer,
+        list(loans.values("id", *row_values(LoanSerializer))),
+        FastJSONRenderer(),
+    )
+
+    assert rendered == JSONRenderer().render(
+        InstanceLoanSerializer(list(loans), many=True).data
+    )
+
+
+def test_payment_instances(benchmark, payments):
+    run_serialization(
+        benchmark,
+        InstancePaymentSerializer,
+        list(payments.only("id", "loan_id", "payment_date", "payment_value")),
+        JSONRenderer(),
+    )
+
+
+def test_payment_rows(benchmark, payments):
+    rendered = run_serialization(
+        benchmark,
+        PaymentSerializer,
+        list(payments.values("id", *row_values(PaymentSerializer))),
+        FastJSONRenderer(),
+    )
+
+    assert rendered == JSONRenderer().render(
+        InstancePaymentSerializer(list(payments), many=True).data
+    )
@@ -0,0 +1,102 @@
+import pytest
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from loans.models import Loan
+
+# Fields of the loans made by create_loan and create_loans, unless overridden
+LOAN_FIELDS = {
+    "nominal_value": 1000,
+    "interest_rate": 0.05,
+    "ip_address": "127.0.0.1",
+    "bank": "Banco Teste",
+}
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(request):
+    # Concurrency tests open several connections at once, which needs a real
+    # SQLite file (WAL) instead of the default shared in-memory database
+    for db_settings in settings.DATABASES.values():
+        if db_settings["ENGINE"] == "django.db.backends.sqlite3":
+            test_settings = db_settings.setdefault("TEST", {})
+            if not test_settings.get("NAME"):
+                test_settings["NAME"] = f"{db_settings['NAME']}.test"
+
+    # Then suffixed per xdist worker (_gw0, _gw1, ...), so parallel workers
+    # don't share the file
+    request.getfixturevalue("django_db_modify_db_settings_parallel_suffix")
+
+
+@pytest.fixture(scope="module")
+def module_db(django_db_setup, django_db_blocker):
+    """Database access for module scoped fixtures, e.g. data sets shared by tests.
+
+    The data is created once in a transaction kept open for the module and
+    rolled back after its last test. Tests still need the django_db mark and
+    run in savepoints of it, so they see the data but not each other's
+    changes. Not for modules with transactional tests.
+    """
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
+# Data factories. Session scoped so module scoped fixtures can use them too,
+# the rows they create are rolled back with the test (or module_db)
+
+
+@pytest.fixture(scope="session")
+def create_user():
+    def create(username="testuser", **fields):
+        return User.objects.create_user(
+            username=username, password="testpass", **fields
+        )
+
+    return create
+
+
+@pytest.fixture(scope="session")
+def create_loan():
+    def create(client, **fields):
+        return Loan.objects.create(**{**LOAN_FIELDS, "client": client, **fields})
+
+    return create
+
+
+@pytest.fixture(scope="session")
+def create_loans():
+    # In one query, without the signals Loan.objects.create sends
+    def create(client, count, **fields):
+        return Loan.objects.bulk_create(
+            Loan(**{**LOAN_FIELDS, "client": client, **fields}) for _ in range(count)
+        )
+
+    return create
+
+
+@pytest.fixture
+def user(create_user):
+    return create_user()
+
+
+@pytest.fixture
+def token(user):
+    return Token.objects.create(user=user)
+
+
+@pytest.fixture
+def loan(create_loan, user):
+    return create_loan(user)
@@ -0,0 +1,176 @@
+import pytest
+
+from django.db import connection
+from django.urls import reverse
+
+from loans.models import Loan
+from loans.models import Payment
+from loans.pagination import EstimatedCountPaginator
+
+pytestmark = pytest.mark.django_db
+
+# Session, user, row estimate and count, page, date hierarchy bounds and
+# years: the same whatever the number of rows
+CHANGELIST_MAX_QUERIES = 8
+
+
+@pytest.fixture
+def create_paid_loans(create_loans):
+    def create(client, count):
+        loans = create_loans(client, count)
+        Payment.objects.bulk_create(
+            Payment(loan=loan, payment_date="2024-01-15", payment_value=100)
+            for loan in loans
+        )
+        return loans
+
+    return create
+
+
+def changelist_ids(response):
+    return {str(obj.pk) for obj in response.context["cl"].result_list}
+
+
+@pytest.fixture
+def clients(create_user):
+    return [create_user(username) for username in ("alice", "alicia", "bob")]
+
+
+@pytest.fixture
+def loans(create_paid_loans, clients):
+    return {client.username: create_paid_loans(client, 3) for client in clients}
+
+
+class TestAdminChangeLists:
+    @pytest.mark.parametrize(
+        "url_name", ["admin:loans_loan_changelist", "admin:loans_payment_changelist"]
+    )
+    @pytest.mark.parametrize("rows", [3, 30])
+    def test_changelist_queries_should_not_grow_with_rows(
+        self,
+        admin_client,
+        django_assert_max_num_queries,
+        create_paid_loans,
+        clients,
+        url_name,
+        rows,
+    ):
+        # Arrange
+        create_paid_loans(clients[0], rows)
+
+        # Act
+        with django_assert_max_num_queries(CHANGELIST_MAX_QUERIES):
+            response = admin_client.get(reverse(url_name))
+
+        # Assert
+        assert response.status_code == 200
+        assert len(response.context["cl"].result_list) == rows
+
+    def test_date_hierarchy_drill_down_should_be_bounded(
+        self, admin_client, django_assert_max_num_queries, loans
+    ):
+        # Act
+        with django_assert_max_num_queries(CHANGELIST_MAX_QUERIES):
+            response = admin_client.get(
+                reverse("admin:loans_payment_changelist"),
+                {"payment_date__year": 2024, "payment_date__month": 1},
+            )
+
+        # Assert
+        assert response.status_code == 200
+        assert len(response.context["cl"].result_list) == 9
+
+    def test_loan_search_should_match_id_exactly(self, admin_client, loans):
+        # Arrange
+        loan = loans["bob"][0]
+
+        # Act
+        response = admin_client.get(
+            reverse("admin:loans_loan_changelist"), {"q": str(loan.pk)}
+        )
+
+        # Assert
+        assert changelist_ids(response) == {str(loan.pk)}
+
+    def test_loan_search_should_match_username_prefix(self, admin_client, loans):
+        # Act
+        response = admin_client.get(
+            reverse("admin:loans_loan_changelist"), {"q": "ali"}
+        )
+
+        # Assert
+        expected = loans["alice"] + loans["alicia"]
+        assert changelist_ids(response) == {str(loan.pk) for loan in expected}
+
+    def test_loan_search_should_not_match_inside_usernames(self, admin_client, loans):
+        # Act
+        response = admin_client.get(reverse("admin:loans_loan_changelist"), {"q": "ob"})
+
+        # Assert
+        assert changelist_ids(response) == set()
+
+    def test_payment_search_should_match_loan_id(self, admin_client, loans):
+        # Arrange
+        loan = loans["bob"][0]
+
+        # Act
+        response = admin_client.get(
+            reverse("admin:loans_payment_changelist"), {"q": str(loan.pk)}
+        )
+
+        # Assert
+        expected = Payment.objects.filter(loan=loan).values_list("pk", flat=True)
+        assert changelist_ids(response) == {str(pk) for pk in expected}
+
+    def test_payment_search_should_match_username_prefix(self, admin_client, loans):
+        # Act
+        response = admin_client.get(
+            reverse("admin:loans_payment_changelist"), {"q": "bob"}
+        )
+
+        # Assert
+        expected = Payment.objects.filter(loan__client__username="bob")
+        assert changelist_ids(response) == {
+            str(pk) for pk in expected.values_list("pk", flat=True)
+        }
+
+
+@pytest.mark.skipif(
+    connection.vendor not in ("sqlite", "postgresql"),
+    reason="Row estimates are read from SQLite and PostgreSQL statistics",
+)
+class TestEstimatedCountPaginator:
+    @pytest.fixture
+    def analyzed_loans(self, loans):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_should_count_exactly_without_statistics(self, loans):
+        paginator = EstimatedCountPaginator(Loan.objects.order_by("pk"), 100)
+
+        assert paginator.count == 9
+
+    def test_should_estimate_unfiltered_count(
+        self, create_paid_loans, analyzed_loans, clients
+    ):
+        create_paid_loans(clients[0], 2)
+        paginator = EstimatedCountPaginator(Loan.objects.order_by("pk"), 100)
+        paginator.exact_count_below = 5
+
+        # The estimate is as of the ANALYZE, before the last loans
+        assert paginator.count == 9
+
+    def test_should_count_small_tables_exactly(
+        self, create_paid_loans, analyzed_loans, clients
+    ):
+        create_paid_loans(clients[0], 2)
+        paginator = EstimatedCountPaginator(Loan.objects.order_by("pk"), 100)
+
+        assert paginator.count == 11
+
+    def test_should_count_filtered_changelists_exactly(self, analyzed_loans, clients):
+        queryset = Loan.objects.filter(client=clients[0]).order_by("pk")
+        paginator = EstimatedCountPaginator(queryset, 100)
+        paginator.exact_count_below = 5
+
+        assert paginator.count == 3
@@ -0,0 +1,158 @@
+import json
+
+from datetime import date
+
+import pytest
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from loans import async_views
+from loans.models import Loan
+from loans.models import Payment
+from loans.views import LoanListCreateView
+from loans.views import PaymentListCreateView
+from loans.views import RemainingBalanceView
+
+
+@pytest.fixture
+def loans(create_loan, user):
+    loans = [create_loan(user, nominal_value=1000 + index) for index in range(5)]
+    for loan in loans:
+        Payment.objects.create(
+            loan=loan, payment_date=date(2024, 1, 1), payment_value=100
+        )
+    return loans
+
+
+def call_async(view, path, token=None, data=None, method="get", **kwargs):
+    headers = {"Authorization": f"Token {token.key}"} if token else {}
+    request = getattr(AsyncRequestFactory(), method)(
+        path, data, content_type="application/json", headers=headers
+    )
+    return async_to_sync(view)(request, **kwargs)
+
+
+def call_sync(view, path, token, data=None, **kwargs):
+    request = APIRequestFactory().get(
+        path, data, HTTP_AUTHORIZATION=f"Token {token.key}"
+    )
+    response = view.as_view()(request, **kwargs)
+    response.render()
+    return response
+
+
+@pytest.mark.django_db
+class TestAsyncReadViews:
+    @pytest.mark.parametrize(
+        "async_view, sync_view, name",
+        [
+            (async_views.loan_list, LoanListCreateView, "loans"),
+            (async_views.payment_list, PaymentListCreateView, "payments"),
+        ],
+    )
+    def test_should_return_the_same_pages_as_the_sync_views(
+        self, token, loans, async_view, sync_view, name
+    ):
+        url = reverse(name)
+
+        first_page = call_async(async_view, url, token, {"page_size": 2})
+        next_url = json.loads(first_page.content)["next"]
+        second_page = call_async(async_view, next_url, token)
+
+        assert first_page.status_code == status.HTTP_200_OK
+        assert (
+            first_page.content
+            == call_sync(sync_view, url, token, {"page_size": 2}).content
+        )
+        assert second_page.content == call_sync(sync_view, next_url, token).content
+        assert len(json.loads(second_page.content)["results"]) == 2
+
+    def test_should_return_the_same_balance_as_the_sync_view(self, token, loans):
+        url = reverse("remaining-balance", kwargs={"id": loans[0].id})
+
+        response = call_async(async_views.remaining_balance, url, token, id=loans[0].id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert (
+            response.content
+            == call_sync(RemainingBalanceView, url, token, id=loans[0].id).content
+        )
+
+    def test_should_forbid_balance_of_another_client(self, loans, create_user):
+        other = create_user("other")
+        url = reverse("remaining-balance", kwargs={"id": loans[0].id})
+
+        response = call_async(
+            async_views.remaining_balance,
+            url,
+            Token.objects.create(user=other),
+            id=loans[0].id,
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_should_return_404_for_unknown_loan(self, token):
+        loan_id = "00000000-0000-0000-0000-000000000000"
+        url = reverse("remaining-balance", kwargs={"id": loan_id})
+
+        response = call_async(async_views.remaining_balance, url, token, id=loan_id)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert json.loads(response.content) == {"detail": "Not found."}
+
+    def test_should_return_401_without_credentials(self, loans):
+        response = call_async(async_views.loan_list, reverse("loans"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response["WWW-Authenticate"] == "Token"
+
+    def test_should_return_401_for_invalid_token(self, loans):
+        request = AsyncRequestFactory().get(
+            reverse("loans"), headers={"Authorization": "Token invalid"}
+        )
+
+        response = async_to_sync(async_views.loan_list)(request)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert json.loads(response.content) == {"detail": "Invalid token."}
+
+    def test_should_delegate_writes_to_the_sync_view(self, user, token):
+        data = {
+            "nominal_value": 1000,
+            "interest_rate": 0.05,
+            "ip_address": "127.0.0.1",
+            "bank": "Test Bank",
+            "client": user.pk,
+        }
+
+        response = call_async(
+            async_views.loan_list, reverse("loans"), token, data, method="post"
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Loan.objects.filter(client=user).count() == 1
+
+    def test_should_apply_the_throttles_of_the_sync_view(self, settings, token, loans):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                "remaining_balance": "2/min",
+            },
+        }
+        url = reverse("remaining-balance", kwargs={"id": loans[0].id})
+        for _ in range(2):
+            call_async(async_views.remaining_balance, url, token, id=loans[0].id)
+
+        response = call_async(async_views.remaining_balance, url, token, id=loans[0].id)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response["Retry-After"] == "30"
+        assert json.loads(response.content) == {
+            "detail": "Request was throttled. Expected available in 30 seconds."
+        }
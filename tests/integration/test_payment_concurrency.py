@@ -0,0 +1,127 @@
+import threading
+import time
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from django.db import connection
+from django.db.models import Sum
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from loans.models import Payment
+from loans.serializers import PaymentSerializer
+from loans.views import PaymentListCreateView
+
+THREADS = 8
+PAYMENTS_PER_THREAD = 20
+PAYMENT_VALUE = Decimal("10.00")
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPaymentConcurrency:
+    def test_should_never_overpay_a_loan_under_concurrent_payments(
+        self, record_property, create_loan, user
+    ):
+        # Arrange
+        loan = create_loan(user, interest_rate=0)
+        accepted = []
+        rejected = []
+        errors = []
+        barrier = threading.Barrier(THREADS)
+
+        def pay():
+            barrier.wait()
+            try:
+                for _ in range(PAYMENTS_PER_THREAD):
+                    serializer = PaymentSerializer(
+                        data={
+                            "loan": str(loan.pk),
+                            "payment_date": str(date.today()),
+                            "payment_value": str(PAYMENT_VALUE),
+                        }
+                    )
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        serializer.save()
+                        accepted.append(serializer.instance)
+                    except Exception as error:
+                        if "payment_value" not in getattr(error, "detail", {}):
+                            raise
+                        rejected.append(error)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=pay) for _ in range(THREADS)]
+
+        # Act
+        started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started_at
+
+        # Assert
+        loan.refresh_from_db()
+        total_paid = Payment.objects.filter(loan=loan).aggregate(Sum("payment_value"))[
+            "payment_value__sum"
+        ]
+        record_property("payments_seconds", round(elapsed, 3))
+        record_property("accepted_per_second", round(len(accepted) / elapsed))
+        assert errors == []
+        assert len(accepted) == 100
+        assert len(rejected) == THREADS * PAYMENTS_PER_THREAD - 100
+        assert total_paid == loan.total_paid == loan.nominal_value
+        assert loan.payment_count == 100
+
+    def test_should_create_one_payment_for_concurrent_retries_of_a_key(
+        self, create_loan, user
+    ):
+        # Arrange
+        token = Token.objects.create(user=user)
+        loan = create_loan(user, interest_rate=0)
+        responses = []
+        errors = []
+        barrier = threading.Barrier(THREADS)
+
+        def pay():
+            request = APIRequestFactory().post(
+                reverse("payments"),
+                {
+                    "loan": str(loan.pk),
+                    "payment_date": str(date.today()),
+                    "payment_value": str(PAYMENT_VALUE),
+                },
+                format="json",
+                HTTP_AUTHORIZATION=f"Token {token.key}",
+                HTTP_IDEMPOTENCY_KEY="concurrent-retry",
+            )
+            barrier.wait()
+            try:
+                responses.append(PaymentListCreateView.as_view()(request))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=pay) for _ in range(THREADS)]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        loan.refresh_from_db()
+        assert errors == []
+        assert [response.status_code for response in responses] == [201] * THREADS
+        assert len({response.render().content for response in responses}) == 1
+        assert Payment.objects.filter(loan=loan).count() == 1
+        assert loan.total_paid == PAYMENT_VALUE
@@ -0,0 +1,116 @@
+import uuid
+
+import pytest
+
+from django.contrib.admin import site
+from django.db import connection
+from django.db.models import Sum
+
+from loans.admin import PaymentAdmin
+from loans.models import LoanBalanceSnapshot
+from loans.models import Payment
+from loans.views import LoanListCreateView
+from loans.views import PaymentListCreateView
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor not in ("sqlite", "postgresql"),
+        reason="Query plan assertions are written for SQLite and PostgreSQL",
+    ),
+]
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Tiny test tables are always cheaper to scan sequentially
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor)
+
+
+def assert_uses_index(plan, table, index):
+    assert index in plan
+    if connection.vendor == "sqlite":
+        assert f"SCAN {table}" not in plan
+    else:
+        assert f"Seq Scan on {table}" not in plan
+
+
+def assert_not_sorted(plan):
+    if connection.vendor == "sqlite":
+        assert "TEMP B-TREE" not in plan
+    else:
+        assert "Sort" not in plan
+
+
+@pytest.fixture
+def request_user(user):
+    return type("Request", (), {"user": user})()
+
+
+class TestQueryPlans:
+    @pytest.mark.parametrize(
+        "view_class, table, index",
+        [
+            (LoanListCreateView, "loans_loan", "loan_client_id_idx"),
+            (PaymentListCreateView, "loans_payment", "payment_client_id_idx"),
+        ],
+    )
+    @pytest.mark.parametrize(
+        "page",
+        [
+            lambda queryset: queryset.order_by("id"),
+            lambda queryset: queryset.filter(id__gt=uuid.uuid4()).order_by("id"),
+            lambda queryset: queryset.filter(id__lt=uuid.uuid4()).order_by("-id"),
+        ],
+        ids=["first", "next", "previous"],
+    )
+    def test_list_pages_should_be_read_in_order_from_client_id_index(
+        self, request_user, view_class, table, index, page
+    ):
+        queryset = view_class(request=request_user).get_queryset()
+
+        plan = explain(page(queryset)[:101])
+
+        assert_uses_index(plan, table, index)
+        assert_not_sorted(plan)
+
+    def test_payment_sum_per_loan_should_use_covering_index(self, loan):
+        queryset = (
+            Payment.objects.filter(loan=loan)
+            .values("loan")
+            .annotate(total=Sum("payment_value"))
+        )
+
+        plan = explain(queryset)
+
+        assert_uses_index(plan, "loans_payment", "payment_loan_date_value_idx")
+        if connection.vendor == "sqlite":
+            assert "COVERING INDEX" in plan
+
+    def test_snapshot_deletion_by_loan_should_use_loan_date_index(self, loan):
+        queryset = LoanBalanceSnapshot.objects.filter(loan_id__in=[loan.pk])
+
+        plan = explain(queryset.values("id"))
+
+        assert_uses_index(plan, "loans_loanbalancesnapshot", "snapshot_loan_date_idx")
+
+    def test_admin_username_search_should_use_indexes(self, rf):
+        payment_admin = PaymentAdmin(Payment, site)
+        queryset, _ = payment_admin.get_search_results(
+            rf.get("/"), Payment.objects.order_by("-pk"), "test"
+        )
+
+        plan = explain(queryset[:100])
+
+        assert_uses_index(plan, "loans_payment", "payment_client_id_idx")
+        if connection.vendor == "sqlite":
+            assert "SCAN auth_user" not in plan
+
+    def test_admin_date_hierarchy_should_use_date_index(self):
+        plan = explain(Payment.objects.filter(payment_date__year=2024))
+
+        assert_uses_index(plan, "loans_payment", "payment_date_idx")
@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+
+from time import perf_counter
+
+import pytest
+
+from django.conf import settings
+
+# Seconds from starting the interpreter to the first response, imports
+# included, under -X importtime. Around 1s with the docs and 0.9s without
+# on one CPU. Only checked by the benchmarks, wall-clock time depends on the
+# machine
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "3"))
+
+DOCS_MODULES = ("drf_yasg", "rest_framework.documentation", "loan_api.docs_urls")
+
+# Loads the WSGI application as a gunicorn worker does and serves /metrics,
+# which needs no database, then reports the modules it imported
+FIRST_REQUEST = """
+import json
+import sys
+from wsgiref.util import setup_testing_defaults
+
+from loan_api.wsgi import application
+
+environ = {"PATH_INFO": "/metrics", "HTTP_AUTHORIZATION": "Bearer startup"}
+setup_testing_defaults(environ)
+statuses = []
+b"".join(application(environ, lambda status, headers: statuses.append(status)))
+print(json.dumps({"status": statuses[0], "modules": sorted(sys.modules)}))
+"""
+
+
+def top_level_imports(importtime):
+    # (cumulative microseconds, module) of a -X importtime report, slowest first
+    imports = []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)
+
+
+def start_worker(api_docs):
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "loan_api.settings",
+        "DJANGO_SECRET_KEY": "startup",
+        "METRICS_TOKEN": "startup",
+        "DJANGO_ALLOWED_HOSTS": "127.0.0.1",
+        "DJANGO_API_DOCS": "true" if api_docs else "false",
+    }
+    started = perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", FIRST_REQUEST],
+        env=env,
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = perf_counter() - started
+    return elapsed, json.loads(process.stdout), top_level_imports(process.stderr)
+
+
+class TestStartup:
+    @pytest.mark.parametrize("api_docs", [True, False], ids=["docs", "no-docs"])
+    def test_should_serve_the_first_request(self, api_docs, record_property):
+        elapsed, report, imports = start_worker(api_docs)
+
+        # Kept in the junit XML report, to follow it across runs
+        record_property("startup_seconds", round(elapsed, 3))
+        record_property("import_seconds", sum(us for us, _ in imports) / 1e6)
+        assert report["status"] == "200 OK"
+
+    @pytest.mark.benchmark
+    @pytest.mark.parametrize("api_docs", [True, False], ids=["docs", "no-docs"])
+    def test_should_serve_the_first_request_within_budget(self, api_docs):
+        elapsed, _, imports = start_worker(api_docs)
+
+        assert elapsed < STARTUP_BUDGET, f"Slowest imports (us): {imports[:10]}"
+
+    def test_should_not_import_the_docs_stack_when_disabled(self):
+        _, report, _ = start_worker(api_docs=False)
+
+        assert not set(DOCS_MODULES) & set(report["modules"])
+
+    def test_should_import_the_docs_stack_when_enabled(self):
+        _, report, _ = start_worker(api_docs=True)
+
+        assert set(DOCS_MODULES) <= set(report["modules"])
@@ -1,17 +1,42 @@
+import json
+import time
+import uuid
+
 from datetime import date
+from datetime import timedelta
 
 import pytest
 
-from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
 from rest_framework.test import APIRequestFactory
 
+from loan_api.schema import code_version
+from loan_api.schema import schema_document
+from loans.cache import balance_cache
+from loans.cache import idempotency_cache
+from loans.models import ArchivedLoan
+from loans.models import ArchivedPayment
+from loans.models import IdempotencyKey
 from loans.models import Loan
+from loans.models import LoanBalanceSnapshot
 from loans.models import Payment
+from loans.serializers import LoanSerializer
+from loans.serializers import PaymentSerializer
+from loans.views import ArchivedLoanListView
+from loans.views import ArchivedPaymentListView
+from loans.views import BalanceProjectionView
+from loans.views import BulkRemainingBalanceView
+from loans.views import LoanExportView
 from loans.views import LoanListCreateView
+from loans.views import PaymentBulkCreateView
+from loans.views import PaymentExportView
 from loans.views import PaymentListCreateView
+from loans.views import PortfolioAnalyticsView
 from loans.views import RemainingBalanceView
 
 
@@ -20,27 +45,6 @@ def api_client():
     return APIRequestFactory()
 
 
-@pytest.fixture
-def user():
-    return User.objects.create_user(username="testuser", password="testpass")
-
-
-@pytest.fixture
-def token(user):
-    return Token.objects.create(user=user)
-
-
-@pytest.fixture
-def loan(user):
-    return Loan.objects.create(
-        nominal_value=1000,
-        interest_rate=0.05,
-        ip_address="127.0.0.1",
-        bank="Banco Teste",
-        client=user,
-    )
-
-
 @pytest.mark.django_db
 class TestLoanView:
     def test_should_return_401_unauthorized_when_credentials_is_not_provided(
@@ -96,7 +100,75 @@ class TestLoanView:
 
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
+        assert len(response.data["results"]) == 1
+
+    @pytest.mark.parametrize("loans_count", [5, 50])
+    def test_should_run_a_fixed_number_of_queries_per_page(
+        self,
+        api_client,
+        user,
+        token,
+        loans_count,
+        django_assert_num_queries,
+        create_loans,
+    ):
+        # Arrange
+        create_loans(user, loans_count)
+
+        view = LoanListCreateView.as_view()
+        url = reverse("loans")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        with django_assert_num_queries(2):
+            request = api_client.get(url, {"page_size": 3}, format="json", **headers)
+            response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 3
+        assert response.data["next"] is not None
+
+    def test_should_walk_every_loan_following_the_next_cursor(
+        self, api_client, user, token, create_loans
+    ):
+        # Arrange
+        create_loans(user, 7)
+
+        view = LoanListCreateView.as_view()
+        url = reverse("loans") + "?page_size=3"
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        pages = []
+        while url:
+            response = view(api_client.get(url, format="json", **headers))
+            pages.append(len(response.data["results"]))
+            url = response.data["next"]
+
+        # Assert
+        assert pages == [3, 3, 1]
+
+    def test_should_render_rows_as_the_serializer_renders_instances(
+        self, api_client, user, token, loan
+    ):
+        # Arrange
+        view = LoanListCreateView.as_view()
+        url = reverse("loans")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(url, format="json", **headers)
+        response = view(request)
+        response.render()
+
+        # Assert
+        assert response.content == JSONRenderer().render(
+            {"next": None, "previous": None, "results": [LoanSerializer(loan).data]}
+        )
 
 
 @pytest.mark.django_db
@@ -202,7 +274,351 @@ class TestPaymentView:
 
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
+        assert len(response.data["results"]) == 1
+
+    @pytest.mark.parametrize("payments_count", [5, 50])
+    def test_should_run_a_fixed_number_of_queries_per_page(
+        self, api_client, user, token, loan, payments_count, django_assert_num_queries
+    ):
+        # Arrange
+        Payment.objects.bulk_create(
+            Payment(payment_date=date.today(), payment_value=1, loan=loan)
+            for _ in range(payments_count)
+        )
+
+        view = PaymentListCreateView.as_view()
+        url = reverse("payments")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        with django_assert_num_queries(2):
+            request = api_client.get(url, {"page_size": 3}, format="json", **headers)
+            response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 3
+        assert response.data["next"] is not None
+
+    def test_should_render_rows_as_the_serializer_renders_instances(
+        self, api_client, user, token, loan
+    ):
+        # Arrange
+        payment = Payment.objects.create(
+            payment_date=date.today(), payment_value=100, loan=loan
+        )
+
+        view = PaymentListCreateView.as_view()
+        url = reverse("payments")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(url, format="json", **headers)
+        response = view(request)
+        response.render()
+
+        # Assert
+        assert response.content == JSONRenderer().render(
+            {
+                "next": None,
+                "previous": None,
+                "results": [PaymentSerializer(payment).data],
+            }
+        )
+
+
+@pytest.mark.django_db
+class TestPaymentIdempotency:
+    def post_payment(self, api_client, token, loan, key, payment_value=250):
+        data = {
+            "payment_date": date.today(),
+            "payment_value": payment_value,
+            "loan": loan.pk,
+        }
+        request = api_client.post(
+            reverse("payments"),
+            data,
+            format="json",
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+        return PaymentListCreateView.as_view()(request)
+
+    def test_should_replay_the_stored_response_without_queries_when_retried(
+        self,
+        api_client,
+        token,
+        loan,
+        django_assert_num_queries,
+        django_capture_on_commit_callbacks,
+    ):
+        # Arrange
+        with django_capture_on_commit_callbacks(execute=True):
+            first = self.post_payment(api_client, token, loan, "retry-1")
+
+        # Act
+        with django_assert_num_queries(0):
+            retry = self.post_payment(api_client, token, loan, "retry-1")
+
+        # Assert
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert retry.data == first.data
+        assert retry["Idempotent-Replayed"] == "true"
+        assert Payment.objects.count() == 1
+
+    def test_should_replay_from_the_database_when_not_cached(
+        self, api_client, token, loan
+    ):
+        # Arrange
+        first = self.post_payment(api_client, token, loan, "retry-1")
+        idempotency_cache.cache.clear()
+
+        # Act
+        retry = self.post_payment(api_client, token, loan, "retry-1")
+        retry.render()
+        first.render()
+
+        # Assert
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry.content == first.content
+        assert Payment.objects.count() == 1
+
+    def test_should_return_422_when_the_key_is_reused_for_another_request(
+        self, api_client, token, loan
+    ):
+        # Arrange
+        self.post_payment(api_client, token, loan, "retry-1")
+
+        # Act
+        response = self.post_payment(
+            api_client, token, loan, "retry-1", payment_value=100
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert Payment.objects.count() == 1
+
+    def test_should_create_again_once_the_key_expired(self, api_client, token, loan):
+        # Arrange
+        self.post_payment(api_client, token, loan, "retry-1")
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        idempotency_cache.cache.clear()
+
+        # Act
+        response = self.post_payment(api_client, token, loan, "retry-1")
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert "Idempotent-Replayed" not in response
+        assert Payment.objects.count() == IdempotencyKey.objects.count() + 1 == 2
+
+    def test_should_not_store_failed_requests(self, api_client, token, loan):
+        # Act
+        failed = self.post_payment(
+            api_client, token, loan, "retry-1", payment_value=10**6
+        )
+        retry = self.post_payment(api_client, token, loan, "retry-1")
+
+        # Assert
+        assert failed.status_code == status.HTTP_400_BAD_REQUEST
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert "Idempotent-Replayed" not in retry
+
+    def test_should_scope_keys_to_the_user(
+        self, api_client, token, loan, create_loan, create_user
+    ):
+        # Arrange
+        other_user = create_user("otheruser")
+        other_token = Token.objects.create(user=other_user)
+        other_loan = create_loan(other_user)
+        self.post_payment(api_client, token, loan, "retry-1")
+
+        # Act
+        response = self.post_payment(api_client, other_token, other_loan, "retry-1")
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert "Idempotent-Replayed" not in response
+        assert Payment.objects.count() == 2
+
+    def test_should_return_400_bad_request_for_a_too_long_key(
+        self, api_client, token, loan
+    ):
+        # Act
+        response = self.post_payment(api_client, token, loan, "k" * 256)
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Payment.objects.count() == 0
+
+
+@pytest.mark.django_db
+class TestPaymentBulkCreateView:
+    def test_should_return_401_unauthorized_when_credentials_is_not_provided(
+        self, api_client
+    ):
+        # Arrange
+        view = PaymentBulkCreateView.as_view()
+        url = reverse("payments-bulk")
+
+        # Act
+        request = api_client.post(url, data=[], format="json")
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_should_accept_payments_in_date_order_up_to_the_remaining_balance(
+        self, api_client, user, token, loan
+    ):
+        # Arrange
+        view = PaymentBulkCreateView.as_view()
+        url = reverse("payments-bulk")
+
+        today = date.today()
+        data = [
+            {"loan": str(loan.pk), "payment_date": str(today), "payment_value": 450},
+            {
+                "loan": str(loan.pk),
+                "payment_date": str(today - timedelta(days=2)),
+                "payment_value": 500,
+            },
+            {"loan": str(loan.pk), "payment_date": str(today), "payment_value": -1},
+            {
+                "loan": "d253ed71-c8df-4e90-9247-6aa3c539987d",
+                "payment_date": str(today),
+                "payment_value": 1,
+            },
+            {
+                "loan": str(loan.pk),
+                "payment_date": str(today - timedelta(days=1)),
+                "payment_value": 100,
+            },
+        ]
+
+        # Act
+        request = api_client.post(
+            url, data, format="json", HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+        response = view(request)
+
+        # Assert
+        loan.refresh_from_db()
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["accepted"] == 2
+        assert response.data["rejected"] == 3
+        assert [row["status"] for row in response.data["results"]] == [
+            "rejected",
+            "accepted",
+            "rejected",
+            "rejected",
+            "accepted",
+        ]
+        assert response.data["results"][0]["errors"] == {
+            "payment_value": ["Payment amount greater than remaining balance."]
+        }
+        assert response.data["results"][3]["errors"] == {
+            "loan": ["Loan does not exist."]
+        }
+        assert Payment.objects.count() == 2
+        assert loan.total_paid == 600
+        assert loan.payment_count == 2
+        assert loan.last_payment_date == today - timedelta(days=1)
+        assert loan.settled_at is None
+
+    def test_should_record_when_the_payments_settle_the_loan(
+        self, api_client, user, token, loan
+    ):
+        # Arrange
+        view = PaymentBulkCreateView.as_view()
+        url = reverse("payments-bulk")
+
+        data = [
+            {"loan": str(loan.pk), "payment_date": "2024-01-01", "payment_value": 400},
+            {"loan": str(loan.pk), "payment_date": "2024-01-02", "payment_value": 600},
+        ]
+
+        # Act
+        request = api_client.post(
+            url, data, format="json", HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+        response = view(request)
+
+        # Assert
+        loan.refresh_from_db()
+        assert response.data["accepted"] == 2
+        assert loan.calculate_remaining_balance() == 0
+        assert loan.settled_at.date() == timezone.now().date()
+
+    def test_should_accept_ndjson_payments(self, api_client, user, token, loan):
+        # Arrange
+        view = PaymentBulkCreateView.as_view()
+        url = reverse("payments-bulk")
+
+        rows = [
+            {
+                "loan": str(loan.pk),
+                "payment_date": str(date.today()),
+                "payment_value": 1,
+            }
+        ] * 3
+        data = "\n".join(json.dumps(row) for row in rows) + "\n"
+
+        # Act
+        request = api_client.post(
+            url,
+            data,
+            content_type="application/x-ndjson",
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["accepted"] == 3
+        assert Payment.objects.count() == 3
+
+    def test_should_ingest_ten_thousand_payments_in_a_few_queries(
+        self,
+        api_client,
+        user,
+        token,
+        django_assert_max_num_queries,
+        record_property,
+        create_loans,
+    ):
+        # Arrange
+        loans = create_loans(user, 100, interest_rate=0)
+        data = [
+            {
+                "loan": str(loans[index % 100].pk),
+                "payment_date": str(date.today()),
+                "payment_value": "10.00",
+            }
+            for index in range(10000)
+        ]
+
+        view = PaymentBulkCreateView.as_view()
+        url = reverse("payments-bulk")
+
+        # Act
+        started_at = time.perf_counter()
+        # Inserts are chunked, SQLite caps a statement at 999 parameters
+        with django_assert_max_num_queries(60):
+            request = api_client.post(
+                url, data, format="json", HTTP_AUTHORIZATION=f"Token {token.key}"
+            )
+            response = view(request)
+        elapsed = time.perf_counter() - started_at
+
+        # Assert
+        record_property("ingestion_seconds", round(elapsed, 3))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["accepted"] == 10000
+        assert Payment.objects.count() == 10000
+        assert set(Loan.objects.values_list("total_paid", flat=True)) == {1000}
 
 
 @pytest.mark.django_db
@@ -224,16 +640,10 @@ class TestRemainingBalanceView:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
     def test_should_return_403_forbidden_when_user_not_authorized(
-        self, api_client, token, loan
+        self, api_client, token, loan, create_loan, create_user
     ):
         # Arrange
-        loan = Loan.objects.create(
-            nominal_value=1000,
-            interest_rate=0.05,
-            ip_address="127.0.0.1",
-            bank="Banco Teste",
-            client=User.objects.create_user(username="otheruser", password="otherpass"),
-        )
+        loan = create_loan(create_user("otheruser"))
 
         view = RemainingBalanceView.as_view()
         url = reverse("remaining-balance", kwargs={"id": loan.pk})
@@ -273,3 +683,699 @@ class TestRemainingBalanceView:
             response.data["remaining_balance"]
             == loan.nominal_value - payment.payment_value
         )
+
+    def test_should_serve_repeated_reads_from_cache(
+        self, api_client, user, token, loan, django_assert_num_queries
+    ):
+        # Arrange
+        view = RemainingBalanceView.as_view()
+        url = reverse("remaining-balance", kwargs={"id": loan.pk})
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+        view(api_client.get(url, format="json", **headers), id=loan.id)
+        stats = balance_cache.stats()
+
+        # Act
+        with django_assert_num_queries(0):
+            request = api_client.get(url, format="json", **headers)
+            response = view(request, id=loan.id)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["remaining_balance"] == loan.nominal_value
+        assert balance_cache.stats()["hits"] == stats["hits"] + 1
+
+    def test_should_read_new_balance_right_after_a_payment(
+        self, api_client, user, token, loan
+    ):
+        # Arrange
+        view = RemainingBalanceView.as_view()
+        url = reverse("remaining-balance", kwargs={"id": loan.pk})
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+        view(api_client.get(url, format="json", **headers), id=loan.id)
+
+        payment_view = PaymentListCreateView.as_view()
+        data = {"payment_date": date.today(), "payment_value": 250, "loan": loan.pk}
+        payment_view(
+            api_client.post(
+                reverse("payments"),
+                data,
+                format="json",
+                HTTP_AUTHORIZATION=f"Token {token.key}",
+            )
+        )
+
+        # Act
+        request = api_client.get(url, format="json", **headers)
+        response = view(request, id=loan.id)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["remaining_balance"] == 750
+
+
+@pytest.mark.django_db
+class TestBulkRemainingBalanceView:
+    def test_should_return_401_unauthorized_when_credentials_is_not_provided(
+        self, api_client
+    ):
+        # Arrange
+        view = BulkRemainingBalanceView.as_view()
+        url = reverse("remaining-balance-bulk")
+
+        # Act
+        request = api_client.get(url, format="json")
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_should_stream_balances_of_all_client_loans_in_a_single_query(
+        self,
+        api_client,
+        user,
+        token,
+        loan,
+        django_assert_num_queries,
+        create_loan,
+        create_user,
+    ):
+        # Arrange
+        Payment.objects.create(payment_date=date.today(), payment_value=175, loan=loan)
+        create_loan(create_user("otheruser"))
+
+        view = BulkRemainingBalanceView.as_view()
+        url = reverse("remaining-balance-bulk")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        with django_assert_num_queries(2):
+            request = api_client.get(url, format="json", **headers)
+            response = view(request)
+            content = b"".join(response.streaming_content)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(content) == [
+            {
+                "id": str(loan.id),
+                "nominal_value": "1000.00",
+                "request_date": str(loan.request_date),
+                "remaining_balance": 825.0,
+            }
+        ]
+
+    def test_should_return_same_balances_as_single_loan_endpoint(
+        self, api_client, user, token, loan, create_loan
+    ):
+        # Arrange
+        other_loan = create_loan(
+            user, nominal_value=2500, interest_rate=0.08, iof_rate=0.01
+        )
+        Loan.objects.filter(pk=other_loan.pk).update(request_date=date(2024, 1, 1))
+        Payment.objects.create(payment_date=date.today(), payment_value=300, loan=loan)
+        Payment.objects.create(
+            payment_date=date.today(), payment_value=123.45, loan=other_loan
+        )
+
+        view = BulkRemainingBalanceView.as_view()
+        url = reverse("remaining-balance-bulk")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.post(
+            url, {"ids": [str(loan.id), str(other_loan.id)]}, format="json", **headers
+        )
+        response = view(request)
+        content = json.loads(b"".join(response.streaming_content))
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        for item in content:
+            single_view = RemainingBalanceView.as_view()
+            single_url = reverse("remaining-balance", kwargs={"id": item["id"]})
+            single_response = single_view(
+                api_client.get(single_url, format="json", **headers), id=item["id"]
+            )
+            assert item == json.loads(single_response.render().content)
+        assert len(content) == 2
+
+    def test_should_return_400_bad_request_when_ids_are_not_provided(
+        self, api_client, user, token
+    ):
+        # Arrange
+        view = BulkRemainingBalanceView.as_view()
+        url = reverse("remaining-balance-bulk")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.post(url, {"ids": []}, format="json", **headers)
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_should_return_400_bad_request_for_a_future_date(
+        self, api_client, user, token, loan
+    ):
+        # Arrange
+        view = BulkRemainingBalanceView.as_view()
+        url = reverse("remaining-balance-bulk")
+        tomorrow = date.today() + timedelta(days=1)
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(url, {"date": tomorrow.isoformat()}, **headers)
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "date" in response.data
+
+
+@pytest.mark.django_db
+class TestBalanceProjectionView:
+    def test_should_return_401_unauthorized_when_credentials_is_not_provided(
+        self, api_client
+    ):
+        # Arrange
+        view = BalanceProjectionView.as_view()
+        url = reverse("loans-projection")
+
+        # Act
+        request = api_client.get(url)
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_should_project_balances_starting_at_the_current_balance(
+        self, api_client, user, token, loan
+    ):
+        # Arrange
+        Payment.objects.create(payment_date=date.today(), payment_value=175, loan=loan)
+        loan.refresh_from_db()
+
+        view = BalanceProjectionView.as_view()
+        url = reverse("loans-projection")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(url, {"days": 60, "step": 30}, **headers)
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["dates"] == [
+            date.today() + timedelta(days=offset) for offset in (0, 30, 60)
+        ]
+        assert response.data["results"] == [
+            {
+                "id": loan.id,
+                "balances": [float(loan.calculate_remaining_balance()), 866.25, 907.5],
+            }
+        ]
+
+
+@pytest.mark.django_db
+class TestPortfolioAnalyticsView:
+    def test_should_return_403_forbidden_when_user_is_not_staff(
+        self, api_client, token
+    ):
+        # Arrange
+        view = PortfolioAnalyticsView.as_view()
+        url = reverse("loans-analytics")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(url, **headers)
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_should_return_totals_of_every_client_grouped_by_bank(
+        self, api_client, user, token, loan, create_loan, create_user
+    ):
+        # Arrange
+        other_user = create_user("otheruser")
+        other_loan = create_loan(
+            other_user, nominal_value=500, interest_rate=0.03, bank="Other Bank"
+        )
+        Payment.objects.create(payment_date=date.today(), payment_value=100, loan=loan)
+        loan.refresh_from_db()
+        user.is_staff = True
+        user.save()
+
+        view = PortfolioAnalyticsView.as_view()
+        url = reverse("loans-analytics")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(url, {"group_by": "bank"}, **headers)
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["group_by"] == ["bank"]
+        assert [
+            (row["bank"], row["loans"], row["paid"], row["remaining_balance"])
+            for row in response.data["results"]
+        ] == [
+            ("Banco Teste", 1, 100, loan.calculate_remaining_balance()),
+            ("Other Bank", 1, 0, other_loan.calculate_remaining_balance()),
+        ]
+
+    def test_should_return_400_bad_request_for_an_unknown_group(
+        self, api_client, user, token
+    ):
+        # Arrange
+        user.is_staff = True
+        user.save()
+
+        view = PortfolioAnalyticsView.as_view()
+        url = reverse("loans-analytics")
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(url, {"group_by": "ip_address"}, **headers)
+        response = view(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestExportView:
+    def test_should_return_401_unauthorized_when_credentials_is_not_provided(
+        self, api_client
+    ):
+        # Arrange
+        view = LoanExportView.as_view()
+        url = reverse("loans-export", kwargs={"export_format": "csv"})
+
+        # Act
+        request = api_client.get(url)
+        response = view(request, export_format="csv")
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_should_stream_client_loans_as_csv(
+        self, api_client, user, token, loan, create_loan, create_user
+    ):
+        # Arrange
+        create_loan(create_user("otheruser"))
+
+        view = LoanExportView.as_view()
+        url = reverse("loans-export", kwargs={"export_format": "csv"})
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(url, **headers)
+        response = view(request, export_format="csv")
+        content = b"".join(response.streaming_content).decode()
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "text/csv"
+        assert content.splitlines() == [
+            "id,nominal_value,interest_rate,iof_rate,ip_address,request_date,bank,client",
+            f"{loan.id},1000.00,0.05,0.00,127.0.0.1,{loan.request_date},Banco Teste,{user.pk}",
+        ]
+
+    def test_should_stream_payments_in_date_range_as_ndjson(
+        self, api_client, user, token, loan
+    ):
+        # Arrange
+        payment = Payment.objects.create(
+            payment_date=date(2024, 1, 10), payment_value=175, loan=loan
+        )
+        Payment.objects.create(
+            payment_date=date(2024, 2, 10), payment_value=25, loan=loan
+        )
+
+        view = PaymentExportView.as_view()
+        url = reverse("payments-export", kwargs={"export_format": "ndjson"})
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(
+            url, {"start_date": "2024-01-01", "end_date": "2024-01-31"}, **headers
+        )
+        response = view(request, export_format="ndjson")
+        content = b"".join(response.streaming_content).decode()
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert [json.loads(line) for line in content.splitlines()] == [
+            {
+                "id": str(payment.id),
+                "loan": str(loan.id),
+                "payment_date": "2024-01-10",
+                "payment_value": "175.00",
+            }
+        ]
+
+    def test_should_return_404_not_found_when_format_is_not_supported(
+        self, api_client, user, token
+    ):
+        # Arrange
+        view = PaymentExportView.as_view()
+        url = reverse("payments-export", kwargs={"export_format": "xlsx"})
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        request = api_client.get(url, **headers)
+        response = view(request, export_format="xlsx")
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestMetricsView:
+    def test_should_expose_request_metrics_per_view(self, settings, token, loan):
+        settings.METRICS_TOKEN = "scraper"
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        client.get(reverse("remaining-balance", kwargs={"id": loan.id}))
+        client.credentials(HTTP_AUTHORIZATION="Bearer scraper")
+
+        response = client.get(reverse("metrics"))
+
+        body = response.content.decode()
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"].startswith("text/plain")
+        assert (
+            'http_request_duration_seconds_count{view="remaining-balance",'
+            'method="GET"}' in body
+        )
+        assert 'db_queries_per_request_bucket{view="remaining-balance"' in body
+        assert "balance_cache_misses_total" in body
+
+    @pytest.mark.parametrize("metrics_token", [None, "scraper"])
+    def test_should_forbid_metrics_to_api_clients(self, settings, token, metrics_token):
+        settings.METRICS_TOKEN = metrics_token
+        client = APIClient()
+
+        with_token = client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+        wrong_bearer = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer ")
+
+        assert with_token.status_code == status.HTTP_403_FORBIDDEN
+        assert wrong_bearer.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_should_expose_metrics_to_staff(self, admin_client):
+        response = admin_client.get(reverse("metrics"))
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_should_add_server_timing_header(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        response = client.get(reverse("loans"))
+
+        assert response["Server-Timing"].startswith("db;dur=")
+
+
+@pytest.mark.django_db
+class TestArchiveViews:
+    @pytest.fixture
+    def archived_loan(self, user):
+        loan = ArchivedLoan.objects.create(
+            id=uuid.uuid4(),
+            nominal_value=1000,
+            interest_rate=0.05,
+            ip_address="127.0.0.1",
+            request_date=date(2023, 1, 1),
+            bank="Banco Teste",
+            client=user,
+            iof_rate=0,
+            total_paid=1000,
+            payment_count=1,
+            last_payment_date=date(2023, 1, 1),
+            archived_at=timezone.now(),
+        )
+        ArchivedPayment.objects.create(
+            id=uuid.uuid4(),
+            loan=loan,
+            payment_date=date(2023, 1, 1),
+            payment_value=1000,
+        )
+        return loan
+
+    def test_should_return_401_unauthorized_when_credentials_is_not_provided(
+        self, api_client
+    ):
+        # Arrange
+        request = api_client.get(reverse("archived-loans"))
+
+        # Act
+        response = ArchivedLoanListView.as_view()(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_should_list_archived_loans_and_payments_of_the_client(
+        self, api_client, token, archived_loan, create_user
+    ):
+        # Arrange
+        other = create_user("otheruser")
+        ArchivedLoan.objects.create(
+            id=uuid.uuid4(),
+            nominal_value=500,
+            interest_rate=0.05,
+            ip_address="127.0.0.1",
+            request_date=date(2023, 1, 1),
+            bank="Banco Teste",
+            client=other,
+            iof_rate=0,
+            total_paid=500,
+            payment_count=0,
+            archived_at=timezone.now(),
+        )
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        # Act
+        loans = ArchivedLoanListView.as_view()(
+            api_client.get(reverse("archived-loans"), **headers)
+        )
+        payments = ArchivedPaymentListView.as_view()(
+            api_client.get(reverse("archived-payments"), **headers)
+        )
+
+        # Assert
+        assert loans.status_code == payments.status_code == status.HTTP_200_OK
+        assert [loan["id"] for loan in loans.data["results"]] == [str(archived_loan.id)]
+        assert loans.data["results"][0]["total_paid"] == "1000.00"
+        assert [payment["loan"] for payment in payments.data["results"]] == [
+            archived_loan.id
+        ]
+
+    def test_should_not_allow_writes(self, api_client, token, archived_loan):
+        # Arrange
+        request = api_client.delete(
+            reverse("archived-loans"), HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+
+        # Act
+        response = ArchivedLoanListView.as_view()(request)
+
+        # Assert
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+        assert ArchivedLoan.objects.filter(pk=archived_loan.pk).exists()
+
+
+@pytest.mark.django_db
+class TestThrottling:
+    @pytest.fixture(autouse=True)
+    def rates(self, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                "payments.post": "2/min",
+                "remaining_balance": "2/min",
+            },
+        }
+
+    def test_should_return_429_with_retry_after_when_creating_payments_too_fast(
+        self, api_client, token, loan
+    ):
+        # Arrange
+        def post_payment():
+            request = api_client.post(
+                reverse("payments"),
+                {"payment_date": date.today(), "payment_value": 10, "loan": loan.pk},
+                format="json",
+                HTTP_AUTHORIZATION=f"Token {token.key}",
+            )
+            return PaymentListCreateView.as_view()(request)
+
+        created = [post_payment().status_code for _ in range(2)]
+
+        # Act
+        response = post_payment()
+
+        # Assert
+        assert created == [status.HTTP_201_CREATED] * 2
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response["Retry-After"] == "30"
+        assert Payment.objects.count() == 2
+
+    def test_should_not_throttle_payment_reads_with_the_creation_rate(
+        self, api_client, token
+    ):
+        # Arrange
+        request = api_client.get(
+            reverse("payments"), HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+
+        # Act
+        responses = [PaymentListCreateView.as_view()(request) for _ in range(5)]
+
+        # Assert
+        assert {response.status_code for response in responses} == {status.HTTP_200_OK}
+
+    def test_should_throttle_remaining_balance_polling(self, api_client, token, loan):
+        # Arrange
+        request = api_client.get(
+            reverse("remaining-balance", kwargs={"id": loan.id}),
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+        for _ in range(2):
+            RemainingBalanceView.as_view()(request, id=loan.id)
+
+        # Act
+        response = RemainingBalanceView.as_view()(request, id=loan.id)
+
+        # Assert
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response["Retry-After"] == "30"
+
+
+class TestSchemaView:
+    @pytest.fixture(autouse=True)
+    def schema_document(self, settings, tmp_path):
+        settings.SCHEMA_ROOT = tmp_path
+        schema_document.cache_clear()
+        yield
+        schema_document.cache_clear()
+
+    def test_should_return_the_schema_with_cache_headers(self):
+        client = APIClient()
+
+        response = client.get(reverse("schema-json", kwargs={"format": ".json"}))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/json"
+        assert response["ETag"] == f'"{code_version()}.json"'
+        assert response["Cache-Control"] == "public, max-age=300"
+        assert "/v1/loans/" in json.loads(response.content)["paths"]
+
+    def test_should_return_the_schema_as_yaml(self):
+        client = APIClient()
+
+        response = client.get(reverse("schema-json", kwargs={"format": ".yaml"}))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/yaml"
+        assert response["ETag"] == f'"{code_version()}.yaml"'
+        assert response.content.startswith(b"swagger: '2.0'")
+
+    def test_should_return_304_not_modified_for_a_matching_etag(self):
+        client = APIClient()
+        url = reverse("schema-json", kwargs={"format": ".json"})
+        etag = client.get(url)["ETag"]
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+
+    def test_should_point_the_swagger_ui_to_the_cached_schema(self):
+        client = APIClient()
+
+        response = client.get(reverse("schema-swagger-ui"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert b'"url": "/swagger.json"' in response.content
+
+
+@pytest.mark.django_db
+class TestBalanceSnapshotsInBulkRemainingBalanceView:
+    def get_balances(self, api_client, token, **params):
+        view = BulkRemainingBalanceView.as_view()
+        request = api_client.get(
+            reverse("remaining-balance-bulk"),
+            params,
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+        response = view(request)
+        return response, json.loads(b"".join(response.streaming_content))
+
+    def test_should_read_a_current_snapshot(self, api_client, token, loan):
+        # Arrange
+        LoanBalanceSnapshot.objects.create(
+            loan=loan, date=date.today(), total_paid=0, remaining_balance=123
+        )
+
+        # Act
+        response, balances = self.get_balances(api_client, token)
+
+        # Assert
+        assert balances[0]["remaining_balance"] == 123.0
+
+    def test_should_ignore_a_snapshot_taken_before_a_payment(
+        self, api_client, token, loan
+    ):
+        # Arrange
+        LoanBalanceSnapshot.objects.create(
+            loan=loan, date=date.today(), total_paid=0, remaining_balance=123
+        )
+        Payment.objects.create(loan=loan, payment_date=date.today(), payment_value=100)
+
+        # Act
+        response, balances = self.get_balances(api_client, token)
+
+        # Assert
+        assert balances[0]["remaining_balance"] == 900.0
+
+    def test_should_return_past_balances_from_snapshots(
+        self, api_client, user, token, loan, create_loan
+    ):
+        # Arrange
+        day = date.today() - timedelta(days=10)
+        LoanBalanceSnapshot.objects.create(
+            loan=loan, date=day, total_paid=0, remaining_balance=1000
+        )
+        create_loan(user, nominal_value=500)
+
+        # Act
+        response, balances = self.get_balances(api_client, token, date=str(day))
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert balances == [
+            {
+                "id": str(loan.id),
+                "nominal_value": "1000.00",
+                "request_date": str(loan.request_date),
+                "remaining_balance": 1000.0,
+            }
+        ]
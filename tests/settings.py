@@ -0,0 +1,15 @@
+from loan_api.settings import *  # noqa: F401, F403
+
+# The suite runs without any environment set up
+SECRET_KEY = "tests"
+
+# Hashing passwords with PBKDF2 is slow by design, and most of the time of
+# fixtures creating users. MD5 is fine for throwaway test users
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Tests run with DEBUG off and without collectstatic, i.e. without the manifest
+# of hashed names
+STORAGES = {
+    **STORAGES,  # noqa: F405
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
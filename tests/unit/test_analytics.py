@@ -0,0 +1,152 @@
+import random
+
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from loans.analytics import portfolio_totals
+from loans.analytics import remaining_balance_cents
+from loans.models import Loan
+
+TODAY = date(2024, 3, 1)
+
+
+def random_loans(create_user, prefix, count, rate_step=1, seed=42):
+    generator = random.Random(seed)
+    users = [create_user(f"{prefix}{index}") for index in range(3)]
+    loans = []
+    for _ in range(count):
+        nominal_value = Decimal(generator.randint(100, 10**8)) / 100
+        loans.append(
+            Loan(
+                nominal_value=nominal_value,
+                interest_rate=Decimal(generator.randrange(0, 999, rate_step)) / 100,
+                iof_rate=Decimal(generator.randint(0, 99)) / 100,
+                # Up to twice the principal: paid after interest accrued,
+                # the balance goes below zero
+                total_paid=Decimal(generator.randint(0, 2 * 10**8)) / 100,
+                ip_address="127.0.0.1",
+                bank=generator.choice(["Bank A", "Bank B"]),
+                client=generator.choice(users),
+            )
+        )
+    Loan.objects.bulk_create(loans)
+    for loan in loans:
+        loan.request_date = TODAY - timedelta(days=generator.randint(0, 400))
+        Loan.objects.filter(pk=loan.pk).update(request_date=loan.request_date)
+    return loans
+
+
+def scalar_balance(loan):
+    return Loan.compute_remaining_balance(
+        nominal_value=loan.nominal_value,
+        interest_rate=loan.interest_rate,
+        iof_rate=loan.iof_rate,
+        request_date=loan.request_date,
+        total_paid=loan.total_paid,
+        today=TODAY,
+    )
+
+
+@pytest.fixture(scope="module")
+def exact_loans(module_db, create_user):
+    # Multiples of 0.03 keep rate / 30 exact in Decimal, so even the balances
+    # ending in half a cent round the same way
+    return random_loans(create_user, "exact", 300, rate_step=3)
+
+
+@pytest.fixture(scope="module")
+def any_rate_loans(module_db, create_user):
+    return random_loans(create_user, "any-rate", 300, seed=7)
+
+
+def loans_of(prefix):
+    return Loan.objects.filter(client__username__startswith=prefix)
+
+
+@pytest.mark.django_db
+class TestPortfolioTotals:
+    def test_should_match_the_sum_of_the_scalar_formula(self, exact_loans):
+        loans = exact_loans
+
+        [totals] = portfolio_totals(loans_of("exact"), today=TODAY)
+
+        assert totals["loans"] == 300
+        assert totals["principal"] == sum(loan.nominal_value for loan in loans)
+        assert totals["paid"] == sum(loan.total_paid for loan in loans)
+        assert totals["outstanding_principal"] == sum(
+            loan.nominal_value - loan.total_paid for loan in loans
+        )
+        assert totals["remaining_balance"] == sum(
+            scalar_balance(loan) for loan in loans
+        )
+
+    def test_should_match_the_scalar_formula_per_group(self, exact_loans):
+        rows = portfolio_totals(
+            loans_of("exact"), group_by=["bank", "client", "month"], today=TODAY
+        )
+
+        expected = {}
+        for loan in exact_loans:
+            key = (loan.bank, loan.client_id, loan.request_date.replace(day=1))
+            expected[key] = expected.get(key, 0) + scalar_balance(loan)
+        assert {
+            (row["bank"], row["client"], row["month"]): row["remaining_balance"]
+            for row in rows
+        } == expected
+        assert [(row["bank"], row["client"], row["month"]) for row in rows] == sorted(
+            expected
+        )
+
+    def test_should_round_overpaid_loans_like_the_scalar_formula(self, exact_loans):
+        cents = dict(
+            loans_of("exact")
+            .annotate(cents=remaining_balance_cents(TODAY))
+            .values_list("pk", "cents")
+        )
+
+        overpaid = [loan for loan in exact_loans if scalar_balance(loan) < 0]
+        assert overpaid
+        for loan in overpaid:
+            assert Decimal(cents[loan.pk]).scaleb(-2) == scalar_balance(loan)
+
+    def test_should_be_within_a_cent_per_loan_with_any_rate(self, any_rate_loans):
+        [totals] = portfolio_totals(loans_of("any-rate"), today=TODAY)
+
+        expected = sum(scalar_balance(loan) for loan in any_rate_loans)
+        assert abs(totals["remaining_balance"] - expected) <= Decimal("0.01") * 300
+
+    def test_should_split_the_balance_into_its_components(self, create_loan, user):
+        loan = create_loan(
+            user, interest_rate=Decimal("0.05"), iof_rate=Decimal("0.01")
+        )
+        Loan.objects.filter(pk=loan.pk).update(
+            request_date=TODAY - timedelta(days=30), total_paid=200
+        )
+
+        [totals] = portfolio_totals(Loan.objects.filter(pk=loan.pk), today=TODAY)
+
+        assert totals["outstanding_principal"] == Decimal("800.00")
+        assert totals["accrued_interest"] == Decimal("40.00")
+        assert totals["iof"] == Decimal("10.00")
+        assert totals["remaining_balance"] == Decimal("850.00")
+
+    def test_should_return_zeros_without_loans(self):
+        [totals] = portfolio_totals(Loan.objects.none(), today=TODAY)
+
+        assert totals["loans"] == 0
+        assert totals["remaining_balance"] == Decimal("0.00")
+
+    def test_should_compute_every_group_in_a_single_query(self, exact_loans):
+        with CaptureQueriesContext(connection) as queries:
+            rows = portfolio_totals(
+                loans_of("exact"), group_by=["bank", "month"], today=TODAY
+            )
+
+        assert len(queries) == 1
+        assert sum(row["loans"] for row in rows) == 300
@@ -0,0 +1,173 @@
+from datetime import date
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+
+from django.utils import timezone
+
+from loans.archive import archive_settled_loans
+from loans.archive import settled_loans
+from loans.cache import balance_cache
+from loans.models import ArchivedLoan
+from loans.models import ArchivedPayment
+from loans.models import Loan
+from loans.models import LoanBalanceSnapshot
+from loans.models import Payment
+
+TODAY = date(2024, 6, 1)
+NOW = timezone.make_aware(datetime.combine(TODAY, time()))
+
+
+def start_of(day):
+    return timezone.make_aware(datetime.combine(day, time()))
+
+
+@pytest.fixture
+def make_loan(create_loan):
+    def make(user, request_date, payments=(), iof_rate="0.01"):
+        # Payments are (date, value), a value of None pays the balance of the date
+        loan = create_loan(user, iof_rate=Decimal(iof_rate))
+        Loan.objects.filter(pk=loan.pk).update(request_date=request_date)
+        loan.refresh_from_db()
+        for payment_date, payment_value in payments:
+            if payment_value is None:
+                payment_value = Loan.compute_remaining_balance(
+                    loan.nominal_value,
+                    loan.interest_rate,
+                    loan.iof_rate,
+                    loan.request_date,
+                    loan.total_paid,
+                    today=payment_date,
+                )
+            Payment.objects.create(
+                loan=loan, payment_date=payment_date, payment_value=payment_value
+            )
+            loan.refresh_from_db()
+        # As if each payment had been made on its date
+        if loan.settled_at:
+            loan.settled_at = start_of(loan.last_payment_date)
+            Loan.objects.filter(pk=loan.pk).update(settled_at=loan.settled_at)
+        return loan
+
+    return make
+
+
+@pytest.mark.django_db
+class TestSettledLoans:
+    def test_should_select_loans_settled_over_the_given_days_ago(self, user, make_loan):
+        old = TODAY - timedelta(days=200)
+        settled = make_loan(user, old, [(old + timedelta(days=10), None)])
+        partly_paid = make_loan(
+            user,
+            old,
+            [(old, Decimal("100")), (old + timedelta(days=10), Decimal("500"))],
+        )
+        recently_settled = make_loan(user, old, [(TODAY - timedelta(days=5), None)])
+        unpaid = make_loan(user, old)
+
+        selected = set(settled_loans(30, now=NOW).values_list("pk", flat=True))
+
+        assert selected == {settled.pk}
+        assert {partly_paid.pk, recently_settled.pk, unpaid.pk}.isdisjoint(selected)
+
+    def test_should_select_loans_paid_in_several_payments(self, user, make_loan):
+        old = TODAY - timedelta(days=200)
+        loan = make_loan(
+            user,
+            old,
+            [
+                (old + timedelta(days=3), Decimal("400")),
+                (old + timedelta(days=40), None),
+            ],
+        )
+
+        assert list(settled_loans(30, now=NOW).values_list("pk", flat=True)) == [
+            loan.pk
+        ]
+
+    def test_should_select_by_settlement_time_not_payment_date(self, user, make_loan):
+        old = TODAY - timedelta(days=200)
+        loan = make_loan(user, old)
+        # Paid off now, with a payment dated long ago by the client
+        Payment.objects.create(
+            loan=loan,
+            payment_date=old,
+            payment_value=loan.calculate_remaining_balance(today=old),
+        )
+        loan.refresh_from_db()
+
+        assert loan.settled_at is not None
+        assert not settled_loans(30).exists()
+        assert list(
+            settled_loans(30, now=loan.settled_at + timedelta(days=31)).values_list(
+                "pk", flat=True
+            )
+        ) == [loan.pk]
+
+    def test_should_not_select_loans_edited_back_into_debt(self, user, make_loan):
+        old = TODAY - timedelta(days=200)
+        loan = make_loan(user, old, [(old + timedelta(days=10), None)])
+        Loan.objects.filter(pk=loan.pk).update(nominal_value=5000)
+
+        assert not settled_loans(30, now=NOW).exists()
+
+
+@pytest.mark.django_db
+class TestArchiveSettledLoans:
+    def test_should_move_settled_loans_and_their_payments_in_batches(
+        self, user, make_loan
+    ):
+        old = TODAY - timedelta(days=200)
+        settled = [
+            make_loan(
+                user, old, [(old, Decimal("300")), (old + timedelta(days=1), None)]
+            )
+            for _ in range(5)
+        ]
+        active = make_loan(user, old, [(old, Decimal("300"))])
+        LoanBalanceSnapshot.objects.create(
+            loan=settled[0],
+            date=old,
+            total_paid=Decimal("300"),
+            remaining_balance=Decimal("710"),
+        )
+        expected = {
+            loan.pk: Loan.objects.filter(pk=loan.pk).values().get() for loan in settled
+        }
+
+        batches = list(archive_settled_loans(30, batch_size=2, now=NOW))
+
+        assert batches == [2, 2, 1]
+        assert list(Loan.objects.values_list("pk", flat=True)) == [active.pk]
+        assert list(Payment.objects.values_list("loan_id", flat=True)) == [active.pk]
+        assert not LoanBalanceSnapshot.objects.exists()
+        assert ArchivedPayment.objects.count() == 10
+        for archived in ArchivedLoan.objects.all():
+            row = expected[archived.pk]
+            assert archived.client_id == row["client_id"]
+            assert archived.request_date == row["request_date"]
+            assert archived.total_paid == row["total_paid"]
+            assert archived.payment_count == row["payment_count"] == 2
+            assert archived.last_payment_date == row["last_payment_date"]
+            assert archived.settled_at == row["settled_at"]
+
+    def test_should_drop_the_cached_balances_of_archived_loans(
+        self, user, make_loan, django_capture_on_commit_callbacks
+    ):
+        old = TODAY - timedelta(days=200)
+        loan = make_loan(user, old, [(old, None)])
+        balance_cache.set(loan.pk, {"client_id": user.pk, "data": {}})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            list(archive_settled_loans(30, now=NOW))
+
+        assert balance_cache.get(loan.pk) is None
+
+    def test_should_archive_nothing_without_settled_loans(self, user, make_loan):
+        make_loan(user, TODAY - timedelta(days=200))
+
+        assert list(archive_settled_loans(30, now=NOW)) == []
+        assert not ArchivedLoan.objects.exists()
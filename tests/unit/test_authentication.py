@@ -0,0 +1,49 @@
+import pytest
+
+from rest_framework import exceptions
+
+from loans.authentication import CachedTokenAuthentication
+from loans.cache import token_cache
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+    def test_should_authenticate_from_cache_without_queries(
+        self, token, django_assert_num_queries
+    ):
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(token.key)
+
+        with django_assert_num_queries(0):
+            user, cached_token = authentication.authenticate_credentials(token.key)
+
+        assert user == token.user
+        assert cached_token.key == token.key
+
+    def test_should_reject_a_deleted_token(self, token):
+        key = token.key
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(key)
+
+        token.delete()
+
+        with pytest.raises(exceptions.AuthenticationFailed, match="Invalid token."):
+            authentication.authenticate_credentials(key)
+
+    def test_should_reject_a_deactivated_user(self, token):
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(token.key)
+
+        token.user.is_active = False
+        token.user.save()
+
+        with pytest.raises(exceptions.AuthenticationFailed, match="inactive"):
+            authentication.authenticate_credentials(token.key)
+
+    def test_should_not_cache_invalid_tokens(self):
+        authentication = CachedTokenAuthentication()
+
+        with pytest.raises(exceptions.AuthenticationFailed):
+            authentication.authenticate_credentials("invalid")
+
+        assert token_cache.get("invalid") is None
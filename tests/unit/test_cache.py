@@ -0,0 +1,104 @@
+from datetime import date
+
+import pytest
+
+from django.core.cache import caches
+
+from loans.cache import BalanceCache
+from loans.cache import TokenCache
+from loans.cache import balance_cache
+from loans.cache import token_cache
+from loans.models import Payment
+
+
+class TestBalanceCache:
+    def test_should_count_hits_and_misses(self):
+        cache = BalanceCache()
+
+        cache.get("loan")
+        cache.set("loan", {"data": {}})
+        cache.get("loan")
+
+        assert cache.stats() == {"hits": 1, "misses": 1}
+
+    def test_should_not_keep_a_balance_loaded_before_a_change(self):
+        cache = BalanceCache()
+        # A request misses and loads the loan, a payment commits meanwhile
+        _, version = cache.lookup("loan")
+        cache.invalidate("loan")
+
+        cache.set("loan", {"data": "old"}, version)
+
+        assert cache.get("loan") is None
+
+    def test_should_keep_a_balance_loaded_since_the_last_change(self):
+        cache = BalanceCache()
+        cache.invalidate("loan")
+        _, version = cache.lookup("loan")
+
+        cache.set("loan", {"data": "new"}, version)
+
+        assert cache.lookup("loan") == ({"data": "new"}, version)
+
+    def test_should_outdate_balances_whose_version_was_evicted(self):
+        cache = BalanceCache()
+        cache.set("loan", {"data": "old"})
+
+        caches["balances"].delete(cache.version_key("loan"))
+
+        assert cache.get("loan") is None
+
+    def test_should_key_entries_by_loan_and_date(self):
+        cache = BalanceCache()
+
+        assert (
+            cache.key("loan", date(2024, 1, 2)) == "remaining_balance:loan:2024-01-02"
+        )
+
+    def test_should_evict_least_recently_used_entries(self):
+        cache = BalanceCache()
+        max_entries = caches["balances"]._max_entries
+
+        cache.set("first", 1)
+        for index in range(max_entries):
+            cache.get("first")
+            cache.set(index, index)
+
+        assert cache.get("first") == 1
+        assert cache.get(0) is None
+
+
+@pytest.mark.django_db
+class TestBalanceCacheInvalidation:
+    def test_should_invalidate_when_a_payment_is_deleted(self, loan):
+        payment = Payment.objects.create(
+            loan=loan, payment_date=date.today(), payment_value=10
+        )
+        balance_cache.set(loan.pk, {"data": {}})
+
+        payment.delete()
+
+        assert balance_cache.get(loan.pk) is None
+
+    def test_should_invalidate_when_a_loan_is_updated(self, loan):
+        balance_cache.set(loan.pk, {"data": {}})
+
+        loan.iof_rate = 0.01
+        loan.save()
+
+        assert balance_cache.get(loan.pk) is None
+
+
+class TestTokenCache:
+    def test_should_not_keep_token_keys_in_cache_keys(self):
+        assert "secret" not in token_cache.key("secret")
+
+    def test_should_expose_its_own_counters(self):
+        cache = TokenCache()
+
+        cache.get("secret")
+
+        assert cache.metrics() == {
+            "token_cache_hits_total": 0,
+            "token_cache_misses_total": 1,
+        }
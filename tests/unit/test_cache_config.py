@@ -0,0 +1,56 @@
+import pytest
+
+from django.core.exceptions import ImproperlyConfigured
+
+from loan_api.cache import LOCMEM_BACKEND
+from loan_api.cache import REDIS_BACKEND
+from loan_api.cache import cache_config
+from loan_api.cache import require_shared_caches
+
+
+class TestCacheConfig:
+    def test_should_keep_a_local_memory_cache_per_process_without_redis(self):
+        config = cache_config("balances", max_entries=500, TIMEOUT=60)
+
+        assert config == {
+            "BACKEND": LOCMEM_BACKEND,
+            "LOCATION": "balances",
+            "TIMEOUT": 60,
+            "OPTIONS": {"MAX_ENTRIES": 500},
+        }
+
+    def test_should_share_the_cache_in_redis_when_given(self):
+        config = cache_config("balances", redis_url="redis://redis:6379/0")
+
+        # MAX_ENTRIES would be passed on to the Redis client, which rejects it
+        assert config == {"BACKEND": REDIS_BACKEND, "LOCATION": "redis://redis:6379/0"}
+
+    def test_should_prefer_the_given_backend_and_location(self):
+        config = cache_config(
+            "throttle",
+            backend="django.core.cache.backends.memcached.PyMemcacheCache",
+            location="memcached:11211",
+            redis_url="redis://redis:6379/0",
+        )
+
+        assert config == {
+            "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+            "LOCATION": "memcached:11211",
+        }
+
+
+class TestRequireSharedCaches:
+    CACHES = {
+        "balances": cache_config("balances", redis_url="redis://redis:6379/0"),
+        "throttle": cache_config("throttle"),
+    }
+
+    def test_should_refuse_local_caches_with_several_workers(self):
+        with pytest.raises(ImproperlyConfigured, match="throttle cache"):
+            require_shared_caches(self.CACHES, ["balances", "throttle"], workers=3)
+
+    def test_should_accept_shared_caches_with_several_workers(self):
+        require_shared_caches(self.CACHES, ["balances"], workers=3)
+
+    def test_should_accept_local_caches_with_a_single_worker(self):
+        require_shared_caches(self.CACHES, ["throttle"], workers=1)
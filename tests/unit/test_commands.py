@@ -0,0 +1,230 @@
+import json
+
+from datetime import date
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from loans.models import ArchivedLoan
+from loans.models import IdempotencyKey
+from loans.models import Loan
+from loans.models import LoanBalanceSnapshot
+from loans.models import Payment
+from loans.snapshots import snapshot_balances
+
+
+@pytest.mark.django_db
+class TestReconcileLoanTotalsCommand:
+    @pytest.fixture
+    def loan(self, loan):
+        Payment.objects.create(
+            loan=loan, payment_date=date(2024, 1, 1), payment_value=100
+        )
+        Payment.objects.create(
+            loan=loan, payment_date=date(2024, 1, 5), payment_value=50
+        )
+        return loan
+
+    def test_should_report_drift_without_changing_totals(self, loan):
+        Loan.objects.filter(pk=loan.pk).update(total_paid=0, payment_count=0)
+        out = StringIO()
+
+        call_command("reconcile_loan_totals", stdout=out)
+
+        loan.refresh_from_db()
+        assert "Checked 1 loans, 1 drifted." in out.getvalue()
+        assert loan.total_paid == 0
+
+    def test_should_repair_drifted_totals_when_fix_is_given(self, loan):
+        Loan.objects.filter(pk=loan.pk).update(
+            total_paid=0, payment_count=0, last_payment_date=None
+        )
+        out = StringIO()
+
+        call_command("reconcile_loan_totals", "--fix", stdout=out)
+
+        loan.refresh_from_db()
+        assert "repaired 1" in out.getvalue()
+        assert loan.total_paid == 150
+        assert loan.payment_count == 2
+        assert loan.last_payment_date == date(2024, 1, 5)
+
+    def test_should_not_report_loans_in_sync(self, loan):
+        out = StringIO()
+
+        call_command("reconcile_loan_totals", stdout=out)
+
+        assert "Checked 1 loans, 0 drifted." in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestProjectBalancesCommand:
+    def test_should_write_one_projected_balance_per_date(self, create_loan, user):
+        loan = create_loan(user, interest_rate=0.03)
+        out = StringIO()
+
+        call_command("project_balances", "--days", "60", "--step", "30", stdout=out)
+
+        header, row = out.getvalue().splitlines()
+        assert header.startswith(f"id,{date.today()},")
+        assert row == f"{loan.id},1000.00,1030.00,1060.00"
+
+
+@pytest.mark.django_db
+class TestSeedLoansCommand:
+    def test_should_create_data_with_consistent_totals(self, tmp_path):
+        tokens_file = tmp_path / "tokens.json"
+        out = StringIO()
+
+        call_command(
+            "seed_loans",
+            "--users=3",
+            "--loans=20",
+            "--payments=200",
+            "--batch-size=7",
+            f"--tokens-file={tokens_file}",
+            stdout=out,
+        )
+
+        reconcile_out = StringIO()
+        call_command("reconcile_loan_totals", stdout=reconcile_out)
+        assert "Created 3 users, 20 loans and 200 payments." in out.getvalue()
+        assert Payment.objects.count() == 200
+        assert "Checked 20 loans, 0 drifted." in reconcile_out.getvalue()
+        assert len(json.loads(tokens_file.read_text())) == 3
+        assert not Loan.objects.filter(request_date=date.today()).exists()
+
+
+@pytest.mark.django_db
+class TestSnapshotBalancesCommand:
+    @pytest.fixture
+    def loans(self, create_loan, user):
+        loans = [
+            create_loan(user, nominal_value=1000 + index, iof_rate=0.01)
+            for index in range(5)
+        ]
+        Loan.objects.update(request_date=date.today() - timedelta(days=45))
+        return loans
+
+    def test_should_snapshot_every_loan_with_its_remaining_balance(self, loans):
+        out = StringIO()
+
+        call_command("snapshot_balances", "--batch-size=2", stdout=out)
+
+        assert "Snapshotted 5 loans" in out.getvalue()
+        for loan in Loan.objects.all():
+            snapshot = LoanBalanceSnapshot.objects.get(loan=loan, date=date.today())
+            assert snapshot.remaining_balance == loan.calculate_remaining_balance()
+
+    def test_should_only_rewrite_loans_paid_since_the_last_run(self, loans):
+        call_command("snapshot_balances", stdout=StringIO())
+        Payment.objects.create(
+            loan=loans[0], payment_date=date.today(), payment_value=100
+        )
+        out = StringIO()
+
+        call_command("snapshot_balances", stdout=out)
+
+        loans[0].refresh_from_db()
+        snapshot = LoanBalanceSnapshot.objects.get(loan=loans[0], date=date.today())
+        assert "Snapshotted 1 loans" in out.getvalue()
+        assert snapshot.total_paid == 100
+        assert snapshot.remaining_balance == loans[0].calculate_remaining_balance()
+
+    def test_should_resume_an_interrupted_run(self, loans):
+        next(snapshot_balances(date.today(), batch_size=2))
+        out = StringIO()
+
+        call_command("snapshot_balances", stdout=out)
+
+        assert "Snapshotted 3 loans" in out.getvalue()
+        assert LoanBalanceSnapshot.objects.count() == 5
+
+    def test_should_delete_snapshots_older_than_keep_days(self, loans):
+        for days_ago in (1, 30, 31):
+            call_command(
+                "snapshot_balances",
+                f"--date={date.today() - timedelta(days=days_ago)}",
+                stdout=StringIO(),
+            )
+        out = StringIO()
+
+        call_command("snapshot_balances", "--keep-days=30", stdout=out)
+
+        assert "deleted 5 old snapshots" in out.getvalue()
+        assert set(LoanBalanceSnapshot.objects.values_list("date", flat=True)) == {
+            date.today() - timedelta(days=days_ago) for days_ago in (0, 1, 30)
+        }
+
+    def test_should_keep_every_snapshot_with_zero_keep_days(self, loans):
+        call_command(
+            "snapshot_balances",
+            f"--date={date.today() - timedelta(days=40)}",
+            stdout=StringIO(),
+        )
+
+        call_command("snapshot_balances", "--keep-days=0", stdout=StringIO())
+
+        assert LoanBalanceSnapshot.objects.count() == 10
+
+    def test_should_drop_todays_snapshot_when_a_loan_is_edited(self, loans):
+        call_command("snapshot_balances", stdout=StringIO())
+
+        loans[0].interest_rate = 0.1
+        loans[0].save()
+
+        assert not LoanBalanceSnapshot.objects.filter(loan=loans[0]).exists()
+
+
+@pytest.mark.django_db
+class TestPurgeIdempotencyKeysCommand:
+    def test_should_delete_expired_keys_in_batches(self, user):
+        now = timezone.now()
+        IdempotencyKey.objects.bulk_create(
+            IdempotencyKey(
+                user=user,
+                key=f"key-{index}",
+                fingerprint="fingerprint",
+                status_code=201,
+                response={},
+                expires_at=now + timedelta(hours=index - 5),
+            )
+            for index in range(8)
+        )
+        out = StringIO()
+
+        call_command("purge_idempotency_keys", "--batch-size=2", stdout=out)
+
+        assert "Purged 6 expired keys." in out.getvalue()
+        assert sorted(IdempotencyKey.objects.values_list("key", flat=True)) == [
+            "key-6",
+            "key-7",
+        ]
+
+
+@pytest.mark.django_db
+class TestArchiveLoansCommand:
+    def test_should_archive_settled_loans_and_report_hot_table_rows(
+        self, create_loan, user
+    ):
+        loans = [create_loan(user, interest_rate=0) for _ in range(2)]
+        old = date.today() - timedelta(days=200)
+        Payment.objects.create(loan=loans[0], payment_date=old, payment_value=1000)
+        Payment.objects.create(loan=loans[1], payment_date=old, payment_value=500)
+        # Settled when paid, 200 days ago
+        Loan.objects.filter(settled_at__isnull=False).update(
+            settled_at=timezone.now() - timedelta(days=200)
+        )
+        out = StringIO()
+
+        call_command("archive_loans", "--days=30", stdout=out)
+
+        output = out.getvalue()
+        assert "Hot tables before: 2 loans, 2 payments" in output
+        assert "Hot tables after: 1 loans, 1 payments" in output
+        assert "Archived 1 settled loans." in output
+        assert ArchivedLoan.objects.get().pk == loans[0].pk
@@ -0,0 +1,99 @@
+from pathlib import Path
+
+import pytest
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.utils import ConnectionHandler
+
+from loan_api.database import database_config
+
+
+class TestDatabaseConfig:
+    def test_should_build_sqlite_config_relative_to_base_dir(self):
+        config = database_config("sqlite:///db.sqlite3", base_dir=Path("/app"))
+
+        assert config["ENGINE"] == "django.db.backends.sqlite3"
+        assert config["NAME"] == "/app/db.sqlite3"
+        assert config["OPTIONS"] == {"timeout": 20.0}
+
+    def test_should_keep_absolute_sqlite_paths(self):
+        config = database_config(
+            "sqlite:////var/lib/loans.sqlite3?timeout=5", base_dir=Path("/app")
+        )
+
+        assert config["NAME"] == "/var/lib/loans.sqlite3"
+        assert config["OPTIONS"] == {"timeout": 5.0}
+
+    def test_should_build_postgres_config_with_persistent_connections(self):
+        config = database_config(
+            "postgres://loans:s%40cret@db:5432/loans?sslmode=require",
+            conn_max_age=60,
+        )
+
+        assert config == {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": "loans",
+            "USER": "loans",
+            "PASSWORD": "s@cret",
+            "HOST": "db",
+            "PORT": "5432",
+            "CONN_MAX_AGE": 60,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {"sslmode": "require"},
+        }
+
+    def test_should_disable_persistent_connections_when_pooling(self):
+        config = database_config(
+            "postgresql://loans@db/loans", conn_max_age=60, pool_size=10
+        )
+
+        assert config["CONN_MAX_AGE"] == 0
+        assert config["CONN_HEALTH_CHECKS"] is False
+        assert config["OPTIONS"] == {"pool": {"min_size": 1, "max_size": 10}}
+
+    def test_should_reject_unsupported_schemes(self):
+        with pytest.raises(ImproperlyConfigured):
+            database_config("mysql://loans@db/loans")
+
+
+@pytest.mark.django_db
+class TestDatabaseConnection:
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite only")
+    def test_should_tune_sqlite_connections_for_concurrency(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            synchronous = cursor.fetchone()[0]
+            cursor.execute("PRAGMA busy_timeout")
+            busy_timeout = cursor.fetchone()[0]
+
+        # 1 is NORMAL, the in-memory test database can't switch to WAL
+        assert synchronous == 1
+        assert busy_timeout == 20000
+
+    def test_should_open_sqlite_files_in_wal_mode(self, tmp_path):
+        handler = ConnectionHandler(
+            {"default": database_config("sqlite:///loans.sqlite3", base_dir=tmp_path)}
+        )
+        sqlite_connection = handler["default"]
+
+        try:
+            with sqlite_connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal_mode = cursor.fetchone()[0]
+        finally:
+            sqlite_connection.close()
+
+        assert journal_mode == "wal"
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="PostgreSQL only")
+    def test_should_reuse_postgres_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            pid = cursor.fetchone()[0]
+
+        connection.close_if_unusable_or_obsolete()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            assert cursor.fetchone()[0] == pid
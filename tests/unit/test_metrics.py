@@ -0,0 +1,94 @@
+from time import perf_counter
+
+import pytest
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from loan_api.metrics import REQUEST_DURATION
+from loan_api.metrics import Histogram
+from loan_api.middleware import PerformanceMiddleware
+
+# Middleware overhead allowed per request, without any SQL. Only checked by
+# the benchmarks, wall-clock time depends on the machine and load
+OVERHEAD_BUDGET_US = 100
+
+
+@pytest.fixture(autouse=True)
+def clear_histograms():
+    yield
+    REQUEST_DURATION.clear()
+
+
+class TestHistogram:
+    def test_should_render_cumulative_buckets(self):
+        histogram = Histogram("latency", "Latency.", ("view",), buckets=(0.1, 1))
+
+        histogram.observe(("loans",), 0.05)
+        histogram.observe(("loans",), 0.5)
+        histogram.observe(("loans",), 5)
+
+        assert list(histogram.render()) == [
+            "# HELP latency Latency.",
+            "# TYPE latency histogram",
+            'latency_bucket{view="loans",le="0.1"} 1',
+            'latency_bucket{view="loans",le="1.0"} 2',
+            'latency_bucket{view="loans",le="+Inf"} 3',
+            'latency_sum{view="loans"} 5.55',
+            'latency_count{view="loans"} 3',
+        ]
+
+    def test_should_escape_label_values(self):
+        histogram = Histogram("latency", "Latency.", ("view",), buckets=(1,))
+
+        histogram.observe(('say "hi"',), 0)
+
+        assert 'view="say \\"hi\\""' in "\n".join(histogram.render())
+
+
+class TestPerformanceMiddleware:
+    def test_should_report_queries_in_server_timing(self, db):
+        def view(request):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.execute("SELECT 2")
+            return HttpResponse()
+
+        response = PerformanceMiddleware(view)(RequestFactory().get("/"))
+
+        assert 'desc="2 queries"' in response["Server-Timing"]
+        assert "total;dur=" in response["Server-Timing"]
+        assert 'view="unmatched",method="GET",le="+Inf"} 1' in "\n".join(
+            REQUEST_DURATION.render()
+        )
+
+    def test_should_count_queries_of_async_views(self, db):
+        async def view(request):
+            await User.objects.acount()
+            return HttpResponse()
+
+        response = async_to_sync(PerformanceMiddleware(view))(RequestFactory().get("/"))
+
+        assert 'desc="1 queries"' in response["Server-Timing"]
+
+    @pytest.mark.benchmark
+    def test_should_stay_within_overhead_budget(self):
+        middleware = PerformanceMiddleware(lambda request: HttpResponse())
+        bare = lambda request: HttpResponse()  # noqa: E731
+        request = RequestFactory().get("/")
+        rounds = 2000
+
+        def measure(handler):
+            started = perf_counter()
+            for _ in range(rounds):
+                handler(request)
+            return (perf_counter() - started) / rounds
+
+        overhead = min(measure(middleware) for _ in range(3)) - min(
+            measure(bare) for _ in range(3)
+        )
+
+        assert overhead * 1_000_000 < OVERHEAD_BUDGET_US
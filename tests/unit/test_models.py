@@ -3,6 +3,7 @@ from datetime import date
 import pytest
 
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from loans.models import Loan
 from loans.models import Payment
@@ -46,3 +47,159 @@ class TestModels:
         )
 
         assert payment.id is not None
+
+    def test_should_update_loan_payment_totals_when_payment_is_created(self, loan):
+
+        Payment.objects.create(
+            loan=loan, payment_date=date(2024, 2, 1), payment_value=100
+        )
+        Payment.objects.create(
+            loan=loan, payment_date=date(2024, 1, 1), payment_value=50
+        )
+
+        loan.refresh_from_db()
+        assert loan.total_paid == 150
+        assert loan.payment_count == 2
+        assert loan.last_payment_date == date(2024, 2, 1)
+        assert loan.calculate_remaining_balance() == 850
+
+    def test_should_calculate_remaining_balance_without_querying_payments(
+        self, django_assert_num_queries, loan
+    ):
+        Payment.objects.create(loan=loan, payment_date=date.today(), payment_value=100)
+        loan.refresh_from_db()
+
+        with django_assert_num_queries(0):
+            assert loan.calculate_remaining_balance() == 900
+
+    @pytest.fixture
+    def create_loan_with_payments(self, create_user, create_loan):
+        def create(username="testuser"):
+            loan = create_loan(create_user(username))
+            payments = [
+                Payment.objects.create(
+                    loan=loan, payment_date=date(2024, 1, 1), payment_value=50
+                ),
+                Payment.objects.create(
+                    loan=loan, payment_date=date(2024, 2, 1), payment_value=100
+                ),
+            ]
+            return loan, payments
+
+        return create
+
+    def test_should_update_loan_payment_totals_when_payment_is_edited(
+        self, create_loan_with_payments
+    ):
+        loan, payments = create_loan_with_payments()
+
+        payments[1].payment_value = 300
+        payments[1].payment_date = date(2023, 12, 1)
+        payments[1].save()
+
+        loan.refresh_from_db()
+        assert loan.total_paid == 350
+        assert loan.payment_count == 2
+        assert loan.last_payment_date == date(2024, 1, 1)
+
+    def test_should_update_both_loans_when_payment_is_moved(
+        self, create_loan_with_payments
+    ):
+        loan, payments = create_loan_with_payments()
+        other_loan, _ = create_loan_with_payments(username="otheruser")
+
+        payments[1].loan = other_loan
+        payments[1].save()
+
+        loan.refresh_from_db()
+        other_loan.refresh_from_db()
+        assert (loan.total_paid, loan.payment_count) == (50, 1)
+        assert (other_loan.total_paid, other_loan.payment_count) == (250, 3)
+
+    def test_should_keep_the_client_of_the_payments_loan(
+        self, create_loan_with_payments
+    ):
+        loan, payments = create_loan_with_payments()
+        other_loan, _ = create_loan_with_payments(username="otheruser")
+        assert {payment.client_id for payment in payments} == {loan.client_id}
+
+        payments[1].loan = other_loan
+        payments[1].save()
+        payments[1].refresh_from_db()
+        assert payments[1].client_id == other_loan.client_id
+
+        loan.client = other_loan.client
+        loan.save()
+        payments[0].refresh_from_db()
+        assert payments[0].client_id == other_loan.client_id
+
+    def test_should_copy_the_loans_client_to_bulk_created_payments(self, loan):
+        # Loans are loaded once for the payments given only their id
+        Payment.objects.bulk_create(
+            [
+                Payment(loan=loan, payment_date=date(2024, 1, 1), payment_value=1),
+                Payment(
+                    loan_id=loan.pk, payment_date=date(2024, 1, 1), payment_value=1
+                ),
+            ]
+        )
+
+        assert (
+            list(Payment.objects.values_list("client_id", flat=True))
+            == [loan.client_id] * 2
+        )
+
+    def test_should_update_loan_payment_totals_when_payments_are_deleted(
+        self, create_loan_with_payments
+    ):
+        loan, payments = create_loan_with_payments()
+
+        payments[1].delete()
+        loan.refresh_from_db()
+        assert loan.total_paid == 50
+        assert loan.payment_count == 1
+        assert loan.last_payment_date == date(2024, 1, 1)
+
+        Payment.objects.filter(loan=loan).delete()
+        loan.refresh_from_db()
+        assert loan.total_paid == 0
+        assert loan.payment_count == 0
+        assert loan.last_payment_date is None
+
+    def test_should_not_recount_payments_of_deleted_loan(
+        self, django_assert_max_num_queries, create_loan_with_payments
+    ):
+        loan, _ = create_loan_with_payments()
+
+        # Deleting the snapshots, the payments and the loan, and collecting the
+        # payments for their signals: no recount per payment
+        with django_assert_max_num_queries(4):
+            loan.delete()
+
+        assert not Payment.objects.exists()
+
+    def test_should_record_when_the_loan_is_settled(self, loan):
+        # Loans are requested today, 1000 plus 1% of IOF pays them off
+        Loan.objects.filter(pk=loan.pk).update(iof_rate=0.01)
+        Payment.objects.create(
+            loan=loan, payment_date=date(2024, 1, 1), payment_value=500
+        )
+        loan.refresh_from_db()
+        assert loan.settled_at is None
+
+        before = timezone.now()
+        payment = Payment.objects.create(
+            loan=loan, payment_date=date(2024, 1, 1), payment_value=510
+        )
+        loan.refresh_from_db()
+        # When it was paid, not the payment's date
+        assert before <= loan.settled_at <= timezone.now()
+
+        settled_at = loan.settled_at
+        Payment.objects.create(loan=loan, payment_date=date.today(), payment_value=0)
+        loan.refresh_from_db()
+        assert loan.settled_at == settled_at
+
+        payment.delete()
+        loan.refresh_from_db()
+        assert loan.settled_at is None
@@ -0,0 +1,87 @@
+import random
+
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+
+from loans.models import Loan
+from loans.projections import project_balances
+from loans.projections import projection_offsets
+
+TODAY = date(2024, 3, 1)
+
+
+def random_loans(count, seed=42):
+    generator = random.Random(seed)
+    rows = []
+    for index in range(count):
+        nominal_value = Decimal(generator.randint(100, 10**9)) / 100
+        rows.append(
+            (
+                index,
+                nominal_value,
+                Decimal(generator.randint(0, 999)) / 100,
+                Decimal(generator.randint(0, 99)) / 100,
+                TODAY - timedelta(days=generator.randint(0, 2000)),
+                min(nominal_value, Decimal(generator.randint(0, 10**9)) / 100),
+            )
+        )
+    return rows
+
+
+def scalar_balance(row, today):
+    return Loan.compute_remaining_balance(
+        nominal_value=row[1],
+        interest_rate=row[2],
+        iof_rate=row[3],
+        request_date=row[4],
+        total_paid=row[5],
+        today=today,
+    )
+
+
+class TestProjections:
+    def test_should_match_scalar_formula_at_day_zero(self):
+        rows = random_loans(2000)
+
+        ids, cents = project_balances(rows, projection_offsets(0), today=TODAY)
+
+        assert ids == list(range(2000))
+        assert [Decimal(int(value)).scaleb(-2) for value in cents[:, 0]] == [
+            scalar_balance(row, TODAY) for row in rows
+        ]
+
+    def test_should_match_scalar_formula_over_the_whole_schedule(self):
+        rows = random_loans(50, seed=7)
+        offsets = projection_offsets(365, step=7)
+
+        _, cents = project_balances(rows, offsets, today=TODAY)
+
+        for row, balances in zip(rows, cents):
+            for offset, value in zip(offsets, balances):
+                expected = scalar_balance(row, TODAY + timedelta(days=int(offset)))
+                assert Decimal(int(value)).scaleb(-2) == expected
+
+    def test_should_round_exact_half_cents_like_the_scalar_formula(self):
+        # 0.05 / 30 * 3 days * 1.00 is exactly half a cent of interest
+        row = (1, Decimal("1.00"), Decimal("0.05"), Decimal("0"), TODAY, Decimal("0"))
+
+        _, cents = project_balances([row], [3], today=TODAY)
+
+        assert Decimal(int(cents[0, 0])).scaleb(-2) == scalar_balance(
+            row, TODAY + timedelta(days=3)
+        )
+
+    def test_should_not_overflow_with_huge_values(self):
+        row = (
+            1,
+            Decimal("99999999.99"),
+            Decimal("999.99"),
+            Decimal("999.99"),
+            date(1900, 1, 1),
+            Decimal("0"),
+        )
+
+        _, cents = project_balances([row], [0], today=TODAY)
+
+        assert Decimal(int(cents[0, 0])).scaleb(-2) == scalar_balance(row, TODAY)
@@ -0,0 +1,69 @@
+import uuid
+
+from datetime import date
+from datetime import datetime
+from datetime import timezone
+from decimal import Decimal
+
+import pytest
+
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from loan_api import renderers
+from loan_api.renderers import FastJSONRenderer
+
+DATA = {
+    "results": [
+        {
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "nominal_value": Decimal("1000.50"),
+            "request_date": date(2024, 3, 1),
+            "created_at": datetime(2024, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            "bank": "Banco Teste ç \u2028\u2029",
+            "balances": [1.5, 0.1, 123456789.12],
+            "detail": gettext_lazy("Not found."),
+            "client": 1,
+            "paid": None,
+            "active": True,
+        }
+    ],
+    "next": None,
+}
+
+
+class TestFastJSONRenderer:
+    def test_should_render_the_same_bytes_as_the_json_renderer(self):
+        assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+    def test_should_render_the_same_bytes_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, "orjson", None)
+
+        assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+    def test_should_fall_back_to_the_json_renderer_when_indented(self):
+        media_type = "application/json; indent=4"
+
+        assert FastJSONRenderer().render(DATA, media_type) == JSONRenderer().render(
+            DATA, media_type
+        )
+
+    def test_should_fall_back_to_the_json_renderer_for_big_integers(self):
+        data = {"value": 2**70}
+
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    @pytest.mark.skipif(renderers.orjson is None, reason="orjson is not installed")
+    def test_should_encode_with_orjson_when_installed(self, monkeypatch):
+        calls = []
+        dumps = renderers.orjson.dumps
+
+        def spy(*args, **kwargs):
+            calls.append(args)
+            return dumps(*args, **kwargs)
+
+        monkeypatch.setattr(renderers.orjson, "dumps", spy)
+
+        FastJSONRenderer().render(DATA)
+
+        assert len(calls) == 1
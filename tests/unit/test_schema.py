@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from loan_api import schema
+from loan_api.schema import artifact_path
+from loan_api.schema import code_version
+from loan_api.schema import schema_document
+from loan_api.schema import write_schema
+
+
+@pytest.fixture(autouse=True)
+def schema_root(settings, tmp_path):
+    settings.SCHEMA_ROOT = tmp_path / "schema"
+    schema_document.cache_clear()
+    yield settings.SCHEMA_ROOT
+    schema_document.cache_clear()
+
+
+class TestSchema:
+    def test_should_write_the_schema_of_the_current_code_version(self, schema_root):
+        paths = write_schema()
+
+        assert paths == [
+            schema_root / f"openapi-{code_version()}.json",
+            schema_root / f"openapi-{code_version()}.yaml",
+        ]
+        document = json.loads(paths[0].read_bytes())
+        assert document["info"]["title"] == "Matera API"
+        assert "/v1/loans/" in document["paths"]
+
+    def test_should_serve_the_written_artifact(self):
+        artifact_path(".json", code_version()).parent.mkdir(parents=True)
+        artifact_path(".json", code_version()).write_bytes(b'{"swagger": "2.0"}')
+
+        assert schema_document(".json") == b'{"swagger": "2.0"}'
+
+    def test_should_generate_the_schema_once_without_an_artifact(self, monkeypatch):
+        calls = []
+        generate_schema = schema.generate_schema
+
+        def spy():
+            calls.append(None)
+            return generate_schema()
+
+        monkeypatch.setattr(schema, "generate_schema", spy)
+
+        first = schema_document(".json")
+        second = schema_document(".json")
+
+        assert first is second
+        assert len(calls) == 1
+
+    def test_should_ignore_artifacts_of_other_code_versions(self, schema_root):
+        schema_root.mkdir()
+        artifact_path(".json", "0" * 16).write_bytes(b'{"swagger": "2.0"}')
+
+        assert b'"/v1/loans/"' in schema_document(".json")
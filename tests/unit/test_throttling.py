@@ -0,0 +1,190 @@
+import time
+
+from time import perf_counter
+
+import pytest
+
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.views import APIView
+
+from loans.throttling import ScopedTokenBucketThrottle
+from loans.throttling import TokenBucketThrottle
+from loans.throttling import UserTokenBucketThrottle
+
+# Throttling overhead allowed per request, with the local-memory cache. Only
+# checked by the benchmarks, wall-clock time depends on the machine and load
+OVERHEAD_BUDGET_US = 100
+
+RATES = {
+    "user": "3/min",
+    "payments": None,
+    "payments.post": "2/s",
+    "remaining_balance": "4/min",
+}
+
+
+class PaymentsView(APIView):
+    throttle_scope = "payments"
+
+
+class BalanceView(APIView):
+    throttle_scope = "remaining_balance"
+
+
+@pytest.fixture(autouse=True)
+def rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": RATES,
+    }
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Moves the throttles' and the cache's time (key expiry) together
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(TokenBucketThrottle, "timer", staticmethod(lambda: now[0]))
+    return now
+
+
+def make_request(user=None, method="get"):
+    request = getattr(APIRequestFactory(), method)("/")
+    request.user = user or AnonymousUser()
+    force_authenticate(request, user)
+    return request
+
+
+def allow(throttle_class, request, view=APIView()):
+    throttle = throttle_class()
+    return throttle.allow_request(request, view), throttle
+
+
+@pytest.mark.django_db
+class TestUserTokenBucketThrottle:
+    def test_should_allow_a_burst_then_throttle_until_a_token_is_refilled(
+        self, clock, user
+    ):
+        request = make_request(user)
+
+        burst = [allow(UserTokenBucketThrottle, request)[0] for _ in range(3)]
+        allowed, throttle = allow(UserTokenBucketThrottle, request)
+
+        assert burst == [True, True, True]
+        assert allowed is False
+        assert throttle.wait() == 20
+
+    def test_should_refill_one_token_per_interval(self, clock, user):
+        request = make_request(user)
+        for _ in range(3):
+            allow(UserTokenBucketThrottle, request)
+
+        clock[0] += 19.9
+        too_early, throttle = allow(UserTokenBucketThrottle, request)
+        clock[0] += 0.1
+        refilled = allow(UserTokenBucketThrottle, request)[0]
+        then = allow(UserTokenBucketThrottle, request)[0]
+
+        assert too_early is False
+        assert throttle.wait() == pytest.approx(0.1)
+        assert refilled is True
+        assert then is False
+
+    def test_should_not_use_up_tokens_of_throttled_requests(self, clock, user):
+        request = make_request(user)
+        for _ in range(3):
+            allow(UserTokenBucketThrottle, request)
+        for _ in range(10):
+            allow(UserTokenBucketThrottle, request)
+
+        clock[0] += 20
+
+        assert allow(UserTokenBucketThrottle, request)[0] is True
+
+    def test_should_refill_the_whole_bucket_of_an_idle_client(self, clock, user):
+        request = make_request(user)
+        for _ in range(3):
+            allow(UserTokenBucketThrottle, request)
+
+        clock[0] += 60
+
+        assert [allow(UserTokenBucketThrottle, request)[0] for _ in range(4)] == [
+            True,
+            True,
+            True,
+            False,
+        ]
+
+    def test_should_keep_a_bucket_per_user(self, clock, user, create_user):
+        other = create_user("other")
+        for _ in range(3):
+            allow(UserTokenBucketThrottle, make_request(user))
+
+        assert allow(UserTokenBucketThrottle, make_request(other))[0] is True
+        assert allow(UserTokenBucketThrottle, make_request())[0] is True
+
+    def test_should_allow_everything_without_a_rate(self, settings, user):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {**RATES, "user": None},
+        }
+        request = make_request(user)
+
+        assert all(allow(UserTokenBucketThrottle, request)[0] for _ in range(10))
+
+    @pytest.mark.benchmark
+    def test_should_stay_within_overhead_budget(self, settings, user):
+        # Never throttled, every request takes the slowest path: add, incr
+        # and touch
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {**RATES, "user": "1000000/s"},
+        }
+        request = make_request(user)
+        view = APIView()
+        rounds = 2000
+
+        def measure():
+            started = perf_counter()
+            for _ in range(rounds):
+                UserTokenBucketThrottle().allow_request(request, view)
+            return (perf_counter() - started) / rounds
+
+        overhead = min(measure() for _ in range(3))
+
+        assert overhead * 1_000_000 < OVERHEAD_BUDGET_US
+
+
+@pytest.mark.django_db
+class TestScopedTokenBucketThrottle:
+    def test_should_use_the_rate_of_the_method_when_set(self, clock, user):
+        posts = [
+            allow(ScopedTokenBucketThrottle, make_request(user, "post"), PaymentsView())
+            for _ in range(3)
+        ]
+        gets = [
+            allow(ScopedTokenBucketThrottle, make_request(user), PaymentsView())[0]
+            for _ in range(10)
+        ]
+
+        assert [allowed for allowed, _ in posts] == [True, True, False]
+        assert posts[-1][1].wait() == 0.5
+        assert all(gets)
+
+    def test_should_share_the_bucket_of_a_scope_between_views(self, clock, user):
+        for _ in range(4):
+            allow(ScopedTokenBucketThrottle, make_request(user), BalanceView())
+
+        allowed, throttle = allow(
+            ScopedTokenBucketThrottle, make_request(user, "post"), BalanceView()
+        )
+
+        assert allowed is False
+        assert throttle.wait() == 15
+
+    def test_should_ignore_views_without_a_scope(self, clock, user):
+        request = make_request(user)
+
+        assert all(allow(ScopedTokenBucketThrottle, request)[0] for _ in range(10))